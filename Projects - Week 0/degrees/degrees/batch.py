@@ -0,0 +1,117 @@
+import json
+import multiprocessing
+import sys
+
+import degrees
+
+USAGE = ("Usage: python batch.py directory queries "
+         "[--source NAME] [--processes N] [--compact]")
+
+
+def main():
+    args = sys.argv[1:]
+    options = {"--source": None, "--processes": None}
+    for option in options:
+        if option in args:
+            i = args.index(option)
+            if i + 1 >= len(args):
+                sys.exit(USAGE)
+            options[option] = args[i + 1]
+            del args[i:i + 2]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    if len(args) != 2:
+        sys.exit(USAGE)
+    directory, filename = args
+    processes = options["--processes"]
+
+    # Load data once; forked workers share it copy-on-write
+    degrees.load_data(directory, compact=compact)
+
+    with open(filename, encoding="utf-8") as f:
+        lines = [line.rstrip("\n") for line in f if line.strip()]
+    if options["--source"] is not None:
+        pairs = [(options["--source"], line.strip()) for line in lines]
+    else:
+        pairs = [tuple(line.split("\t", 1)) for line in lines]
+
+    for result in run(pairs, directory, compact,
+                      int(processes) if processes else None):
+        print(json.dumps(result), flush=True)
+
+
+def run(pairs, directory, compact=False, processes=None):
+    """
+    Answers (source name, target name) queries across a process pool,
+    yielding one result dictionary per query as it completes.
+
+    Queries sharing a source are answered from a single search tree.
+    """
+    groups = {}
+    for line, pair in enumerate(pairs, 1):
+        if len(pair) != 2:
+            yield {"line": line, "error": "expected two tab-separated names"}
+            continue
+        source_name, target_name = (name.strip() for name in pair)
+        source = resolve(source_name)
+        target = resolve(target_name)
+        query = {"line": line, "source": source_name, "target": target_name}
+        if "error" in source or "error" in target:
+            failed = source if "error" in source else target
+            query.update(failed)
+            yield query
+            continue
+        query["source_id"] = source["id"]
+        query["target_id"] = target["id"]
+        groups.setdefault(source["id"], []).append(query)
+
+    with multiprocessing.Pool(processes, initializer=init_worker,
+                              initargs=(directory, compact)) as pool:
+        for results in pool.imap_unordered(answer, groups.items()):
+            yield from results
+
+
+def resolve(name):
+    """
+    Resolves a name to a person id without prompting.
+    """
+    person_id = degrees.person_id_for_name(name, interactive=False)
+    if person_id is not None:
+        return {"id": person_id}
+    if name.lower() in degrees.names:
+        error = f"ambiguous name: {name}"
+    else:
+        error = f"person not found: {name}"
+    return {"error": error, "candidates": degrees.find_people(name, 5)}
+
+
+def init_worker(directory, compact):
+    """
+    Loads the data in a worker that did not inherit it from the parent.
+    """
+    if not degrees.people:
+        degrees.load_data(directory, compact=compact)
+
+
+def answer(group):
+    """
+    Answers every query from one source with a single search.
+    """
+    source, queries = group
+    paths = degrees.shortest_paths(
+        source, [query["target_id"] for query in queries]
+    )
+    for query in queries:
+        path = paths[query["target_id"]]
+        if path is None:
+            query["degrees"] = None
+            query["path"] = None
+        else:
+            query["degrees"] = len(path)
+            query["path"] = [list(step) for step in path]
+    return queries
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import degrees
+import snapshot
+import synthetic
+
+USAGE = ("Usage: python benchmark.py [directory] [--synthetic PEOPLE MOVIES] "
+         "[--queries N] [--json FILE]")
+
+# (name, bidirectional, use the oracle) for each search mode
+SEARCHES = [
+    ("breadth-first", False, False),
+    ("bidirectional", True, False),
+    ("bidirectional-oracle", True, True)
+]
+
+# (name, load_data keyword arguments) for each way of loading the data
+LOADERS = [
+    ("csv", {"cache": False}),
+    ("compact", {"compact": True, "cache": False}),
+    ("snapshot", {"cache": True}),
+    ("snapshot-compact", {"compact": True, "cache": True})
+]
+
+
+def reset():
+    """
+    Clears all data loaded by degrees.
+    """
+    degrees.names.clear()
+    degrees.people = {}
+    degrees.movies = {}
+    degrees.graph = None
+    degrees.oracle = None
+    degrees.name_index = None
+
+
+def bench_load(directory):
+    """
+    Times each loader, returning seconds per loader name.
+    """
+    results = {}
+    path = snapshot.snapshot_path(directory)
+    if os.path.exists(path):
+        os.remove(path)
+
+    # The first cached load writes the snapshot, the second reads it
+    reset()
+    start = time.perf_counter()
+    degrees.load_data(directory, cache=True)
+    results["snapshot-write"] = time.perf_counter() - start
+
+    for name, options in LOADERS:
+        reset()
+        start = time.perf_counter()
+        degrees.load_data(directory, **options)
+        results[name] = time.perf_counter() - start
+    return results
+
+
+def bench_search(directory, queries, seed=0):
+    """
+    Runs the same random queries in each search mode, returning
+    throughput statistics per mode. The oracle modes use an oracle
+    built over the loaded data, which is not included in the timings.
+    """
+    results = {}
+    for compact in [False, True]:
+        reset()
+        degrees.load_data(directory, compact=compact)
+        rng = random.Random(seed)
+        person_ids = list(degrees.people)
+        pairs = [(rng.choice(person_ids), rng.choice(person_ids))
+                 for _ in range(queries)]
+        oracle = degrees.build_oracle()
+
+        for name, bidirectional, use_oracle in SEARCHES:
+            degrees.oracle = oracle if use_oracle else None
+            if compact:
+                name += "-compact"
+            times = []
+            explored = 0
+            max_frontier = 0
+            neighbor_time = 0.0
+            for source, target in pairs:
+                _, stats = degrees.shortest_path_with_stats(
+                    source, target, bidirectional
+                )
+                times.append(stats.wall_time)
+                explored += stats.explored
+                max_frontier = max(max_frontier, stats.max_frontier)
+                neighbor_time += stats.neighbor_time
+            total = sum(times)
+            results[name] = {
+                "queries": len(pairs),
+                "total_time": total,
+                "median_ms": statistics.median(times) * 1000,
+                "max_ms": max(times) * 1000,
+                "explored": explored,
+                "max_frontier": max_frontier,
+                "neighbor_time": neighbor_time,
+                "expansions_per_second": explored / total if total else None
+            }
+    return results
+
+
+def main():
+    args = sys.argv[1:]
+    options = {"--queries": ["100"], "--json": [None], "--synthetic": None}
+    for option in list(options):
+        if option in args:
+            i = args.index(option)
+            count = 2 if option == "--synthetic" else 1
+            if i + count >= len(args):
+                sys.exit(USAGE)
+            options[option] = args[i + 1:i + 1 + count]
+            del args[i:i + 1 + count]
+    if len(args) > 1 or (args and options["--synthetic"]):
+        sys.exit(USAGE)
+
+    if options["--synthetic"]:
+        directory = tempfile.mkdtemp()
+        num_people, num_movies = (int(n) for n in options["--synthetic"])
+        print(f"Generating {num_people} people and {num_movies} movies...")
+        synthetic.generate(directory, num_people, num_movies)
+    else:
+        directory = args[0] if args else "small"
+
+    try:
+        results = {
+            "directory": directory,
+            "load": bench_load(directory),
+            "search": bench_search(directory, int(options["--queries"][0]))
+        }
+    finally:
+        if options["--synthetic"]:
+            shutil.rmtree(directory)
+
+    print("Load (seconds)")
+    for name, seconds in results["load"].items():
+        print(f"    {name:<20} {seconds:10.4f}")
+    print("Search")
+    for name, stats in results["search"].items():
+        rate = stats["expansions_per_second"] or 0
+        print(f"    {name:<30} median {stats['median_ms']:8.3f} ms  "
+              f"max {stats['max_ms']:8.3f} ms  "
+              f"explored {stats['explored']:>9}  "
+              f"{rate:12.0f} expansions/s")
+
+    if options["--json"][0] is not None:
+        with open(options["--json"][0], "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,74 @@
 import csv
+import math
 import sys
+import time
+import tracemalloc
 #import pdb
+from array import array
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import Graph, Records
+from nameindex import NameIndex
+from oracle import Oracle, oracle_path
+from snapshot import read_snapshot, source_signature, write_snapshot
+from util import Node, QueueFrontier, SearchStats
 
 # Maps names to a set of corresponding person_ids
 names = {}
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# (with compact=True, a read-only `Records` of name and birth)
 people = {}
 
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# (with compact=True, a read-only `Records` of title and year)
 movies = {}
 
+# Compact CSR graph of the data, used instead of the "movies" / "stars"
+# sets when data is loaded with compact=True
+graph = None
 
-def load_data(directory):
+# Exact/prefix/fuzzy index of names, built on first use by find_people
+name_index = None
+
+# Landmark distance oracle used to bound and prune searches, if loaded
+oracle = None
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised when a search explores more states than its budget allows.
+    """
+
+
+def load_data(directory, compact=False, cache=True):
     """
     Load data from CSV files into memory.
+
+    If `compact` is true, adjacency is stored in a `Graph` instead of
+    the per-person and per-movie sets.
+
+    If `cache` is true, a binary snapshot is written next to the CSV
+    files and reused on later loads until the CSV files change.
+    """
+    if cache and load_snapshot(directory, compact):
+        return
+
+    if compact:
+        load_compact(directory)
+    else:
+        load_csv(directory)
+
+    if cache:
+        try:
+            write_snapshot(directory, graph or Graph.from_data(people, movies),
+                           people, movies)
+        except OSError:
+            pass
+
+
+def load_csv(directory):
+    """
+    Load data from CSV files into the "movies" / "stars" sets.
     """
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
@@ -53,14 +105,321 @@ def load_data(directory):
                 pass
 
 
+def load_snapshot(directory, compact=False):
+    """
+    Load data from the binary snapshot of a directory, if it is up to date.
+
+    Returns True if the snapshot was used.
+    """
+    global graph, people, movies
+
+    snapshot = read_snapshot(directory)
+    if snapshot is None:
+        return False
+    snapshot_graph, snapshot_people, snapshot_movies = snapshot
+
+    for person_id, name in zip(snapshot_graph.person_ids,
+                               snapshot_people.fields["name"]):
+        if name.lower() not in names:
+            names[name.lower()] = {person_id}
+        else:
+            names[name.lower()].add(person_id)
+
+    if compact:
+        graph = snapshot_graph
+        people = snapshot_people
+        movies = snapshot_movies
+        return True
+
+    people.update(snapshot_people)
+    movies.update(snapshot_movies)
+
+    # Expand the adjacency back into the "movies" / "stars" sets
+    for movie_id in snapshot_graph.movie_ids:
+        movies[movie_id]["stars"] = set()
+    for i, person_id in enumerate(snapshot_graph.person_ids):
+        person_movies = set()
+        for movie in snapshot_graph.movies_for(i):
+            movie_id = snapshot_graph.movie_ids[movie]
+            person_movies.add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+        people[person_id]["movies"] = person_movies
+    return True
+
+
+def load_compact(directory):
+    """
+    Load data from CSV files into memory, storing adjacency as a `Graph`
+    and people and movies as `Records` sharing the graph's id indexes.
+    """
+    global graph, people, movies
+
+    # Load people into parallel lists, sharing repeated birth years
+    person_ids = []
+    person_names = []
+    births = []
+    shared = {}
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            person_ids.append(row["id"])
+            person_names.append(row["name"])
+            births.append(shared.setdefault(row["birth"], row["birth"]))
+            if row["name"].lower() not in names:
+                names[row["name"].lower()] = {row["id"]}
+            else:
+                names[row["name"].lower()].add(row["id"])
+
+    # Load movies
+    movie_ids = []
+    titles = []
+    years = []
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movie_ids.append(row["id"])
+            titles.append(row["title"])
+            years.append(shared.setdefault(row["year"], row["year"]))
+
+    # Load stars as edges between interned ids
+    person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+    edge_people = array("I")
+    edge_movies = array("I")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                person = person_index[row["person_id"]]
+                movie = movie_index[row["movie_id"]]
+            except KeyError:
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+    graph = Graph.from_edges(person_ids, movie_ids, edge_people, edge_movies,
+                             person_index, movie_index)
+    people = Records(person_index, name=person_names, birth=births)
+    movies = Records(movie_index, title=titles, year=years)
+
+
+def load_filtered(directory, min_year=None, max_year=None, min_movies=None,
+                  person_ids=None, compact=False, trace_memory=False):
+    """
+    Load only part of the data from CSV files into memory, in a single
+    pass over each file.
+
+    Keeps movies released between `min_year` and `max_year` (inclusive),
+    and people from the `person_ids` allow-list who starred in at least
+    `min_movies` of the kept movies. Any filter left as None is ignored.
+
+    Returns a dictionary of statistics about the load, including the
+    process's peak resident memory where the platform reports it, and
+    the peak memory allocated while loading if `trace_memory` is true.
+    Tracing makes loading several times slower and larger.
+    """
+    global graph, people, movies
+
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    else:
+        trace_memory = False
+
+    # Load movies in the year range
+    movie_ids = []
+    titles = []
+    years = []
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            if min_year is not None or max_year is not None:
+                try:
+                    year = int(row["year"])
+                except ValueError:
+                    continue
+                if min_year is not None and year < min_year:
+                    continue
+                if max_year is not None and year > max_year:
+                    continue
+            movie_ids.append(row["id"])
+            titles.append(row["title"])
+            years.append(row["year"])
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+    # Load stars of kept movies, counting credits per person
+    person_index = {}
+    credits = array("I")
+    edge_people = array("I")
+    edge_movies = array("I")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movie = movie_index.get(row["movie_id"])
+            if movie is None:
+                continue
+            person_id = row["person_id"]
+            if person_ids is not None and person_id not in person_ids:
+                continue
+            person = person_index.get(person_id)
+            if person is None:
+                person = person_index[person_id] = len(credits)
+                credits.append(0)
+            credits[person] += 1
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+    # Load people with enough credits, renumbering them densely
+    kept = {}
+    person_names = []
+    births = []
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            person_id = row["id"]
+            person = person_index.get(person_id)
+            if person is None:
+                if min_movies or (person_ids is not None
+                                  and person_id not in person_ids):
+                    continue
+            elif min_movies is not None and credits[person] < min_movies:
+                continue
+            kept[person_id] = len(kept)
+            person_names.append(row["name"])
+            births.append(row["birth"])
+            if row["name"].lower() not in names:
+                names[row["name"].lower()] = {person_id}
+            else:
+                names[row["name"].lower()].add(person_id)
+
+    # Drop edges to people who were filtered out or are missing
+    remap = array("I", [0]) * len(credits)
+    missing = len(kept)
+    for person_id, person in person_index.items():
+        remap[person] = kept.get(person_id, missing)
+    kept_people = array("I")
+    kept_movies = array("I")
+    for person, movie in zip(edge_people, edge_movies):
+        person = remap[person]
+        if person != missing:
+            kept_people.append(person)
+            kept_movies.append(movie)
+    del person_index, credits, edge_people, edge_movies, remap
+
+    filtered = Graph.from_edges(list(kept), movie_ids, kept_people,
+                                kept_movies, kept, movie_index)
+    filtered_people = Records(kept, name=person_names, birth=births)
+    filtered_movies = Records(movie_index, title=titles, year=years)
+
+    if compact:
+        graph = filtered
+        people = filtered_people
+        movies = filtered_movies
+    else:
+        people.update(filtered_people)
+        movies.update(filtered_movies)
+        for movie_id in movie_ids:
+            movies[movie_id]["stars"] = set()
+        for i, person_id in enumerate(filtered.person_ids):
+            people[person_id]["movies"] = set()
+            for movie in filtered.movies_for(i):
+                movie_id = movie_ids[movie]
+                people[person_id]["movies"].add(movie_id)
+                movies[movie_id]["stars"].add(person_id)
+
+    stats = {
+        "people": len(kept),
+        "movies": len(movie_ids),
+        "stars": len(filtered.person_movies),
+        "max_rss": _max_rss(),
+        "peak_memory": None
+    }
+    if trace_memory:
+        stats["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return stats
+
+
+def _max_rss():
+    """
+    Returns the peak resident memory of the process in bytes, or None
+    where the resource module is not available.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def build_oracle(k=16):
+    """
+    Builds a landmark distance oracle over the loaded data, using
+    the `k` people with the most movies as landmarks.
+    """
+    global oracle
+
+    if graph is not None:
+        offsets = graph.person_offsets
+        oracle = Oracle.build(
+            graph.person_ids, graph.neighbors,
+            lambda i: offsets[i + 1] - offsets[i], k
+        )
+        return oracle
+
+    person_ids = list(people)
+    index = {person_id: i for i, person_id in enumerate(person_ids)}
+
+    def neighbors_for(i):
+        for movie_id, person_id in neighbors_for_person(person_ids[i]):
+            yield movie_id, index[person_id]
+
+    oracle = Oracle.build(
+        person_ids, neighbors_for,
+        lambda i: len(people[person_ids[i]]["movies"]), k
+    )
+    return oracle
+
+
+def load_oracle(directory):
+    """
+    Loads the oracle saved for a directory, if it was built from the
+    current CSV files and matches the loaded data.
+
+    Returns True if the oracle was loaded.
+    """
+    global oracle
+
+    try:
+        sources = source_signature(directory)
+    except OSError:
+        return False
+    loaded = Oracle.load(oracle_path(directory), sources)
+    if loaded is None or loaded.person_ids != list(people):
+        return False
+    oracle = loaded
+    return True
+
+
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    flags = {flag: flag in args for flag in ["--compact", "--oracle"]}
+    for flag, present in flags.items():
+        if present:
+            args.remove(flag)
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [--compact] [--oracle] "
+                 "[directory]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact=flags["--compact"])
+
+    # The oracle's pruning does not yet pay for itself, so only use
+    # it when asked
+    if flags["--oracle"]:
+        load_oracle(directory)
     print("Data loaded.")
 
     # astra = neighbors_for_person('102')
@@ -74,7 +433,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional=True)
 
     if path is None:
         print("Not connected.")
@@ -89,21 +448,93 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, budget=None,
+                  stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is true, searches breadth-first from both
+    the source and the target, always advancing the smaller frontier.
+
+    If an oracle is loaded, its bounds are used to reject disconnected
+    pairs without searching and to prune the bidirectional search.
+
+    If `budget` is given, raises BudgetExceeded once more than that
+    many states have been explored.
+
+    If `stats` is a SearchStats, it is updated with the work done.
+
     If no possible path, returns None.
     """
-    
-    
+    prune = None
+    if oracle is not None:
+        lower, upper = oracle.bounds(source, target)
+        if lower == math.inf:
+            return None
+        if bidirectional and upper != math.inf:
+            prune = _oracle_pruner(source, target, upper)
+
+    def search(source, target, neighbors_for):
+        if stats is not None:
+            neighbors_for = _measured(neighbors_for, stats)
+        if bidirectional:
+            return _bidirectional_search(source, target, neighbors_for,
+                                         prune, budget, stats)
+        return _search(source, target, neighbors_for, budget, stats)
+
+    if graph is None:
+        return search(source, target, neighbors_for_person)
+
+    path = search(graph.person_index[source], graph.person_index[target],
+                  graph.neighbors)
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path]
+
+
+def shortest_path_with_stats(source, target, bidirectional=False,
+                             budget=None):
+    """
+    Returns a (path, stats) tuple, where `path` is as returned by
+    shortest_path and `stats` is a SearchStats for the search.
+    """
+    stats = SearchStats()
+    start = time.perf_counter()
+    path = shortest_path(source, target, bidirectional, budget, stats)
+    stats.wall_time = time.perf_counter() - start
+    return path, stats
+
+
+def _measured(neighbors_for, stats):
+    """
+    Wraps `neighbors_for` to count and time each expansion in `stats`.
+    """
+    def neighbors(state):
+        start = time.perf_counter()
+        result = list(neighbors_for(state))
+        stats.neighbor_time += time.perf_counter() - start
+        stats.explored += 1
+        stats.generated += len(result)
+        return result
+
+    return neighbors
+
+
+def _search(source, target, neighbors_for, budget=None, stats=None):
+    """
+    Searches from source to target using `neighbors_for` to expand states.
+    """
+    if source == target:
+        return []
+
     # Keep track of number of states explored
     num_explored = 0
 
     # Initialize frontier to just the starting position
     start = Node(state=source, parent=None, action=None)
-    frontier = StackFrontier()
+    frontier = QueueFrontier()
     frontier.add(start)
 
     # Initialize an empty explored set
@@ -114,16 +545,22 @@ def shortest_path(source, target):
 
         # If nothing left in frontier, then no path
         if frontier.empty():
-            raise Exception("no solution")
+            return None
+
+        if stats is not None:
+            stats.max_frontier = max(stats.max_frontier,
+                                     len(frontier.frontier))
 
         # Choose a node from the frontier
         node = frontier.remove()
         num_explored += 1
+        if budget is not None and num_explored > budget:
+            raise BudgetExceeded(f"explored more than {budget} states")
 
         # Mark node as explored
         explored.add(node.state)
 
-        neighbors = neighbors_for_person(node.state)
+        neighbors = neighbors_for(node.state)
         
         # Add neighbors to frontier
         for movieID, personID in neighbors:
@@ -153,15 +590,175 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
-def person_id_for_name(name):
+def _oracle_pruner(source, target, upper):
+    """
+    Returns a function telling whether a state at `depth` from one side
+    need not be expanded because every path through it is longer than
+    the oracle's `upper` bound.
+    """
+    roots = [oracle.column(target), oracle.column(source)]
+    index = oracle.index
+    distances = oracle.distances
+
+    def prune(state, depth, side):
+        # Compact states are graph indices, which the oracle shares
+        i = state if graph is not None else index[state]
+        column = [landmark[i] for landmark in distances]
+        lower, _ = oracle.bounds_for(column, roots[side])
+        return depth + lower > upper
+
+    return prune
+
+
+def _bidirectional_search(source, target, neighbors_for, prune=None,
+                          budget=None, stats=None):
+    """
+    Breadth-first search from both source and target, expanding one
+    whole layer of the smaller frontier at a time.
+
+    States for which `prune(state, depth, side)` is true are reached
+    but not expanded. It is called once per expanded state rather than
+    once per neighbor generated, as the bound costs more than the
+    neighbor itself.
+    """
+    num_explored = 0
+
+    if source == target:
+        return []
+
+    # For each side, map reached states to the (action, state) pair
+    # leading back towards that side's root, and to their depth
+    parents = [{source: None}, {target: None}]
+    depths = [{source: 0}, {target: 0}]
+    frontiers = [[source], [target]]
+
+    while frontiers[0] and frontiers[1]:
+        if stats is not None:
+            stats.max_frontier = max(stats.max_frontier,
+                                     len(frontiers[0]) + len(frontiers[1]))
+
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        other = 1 - side
+
+        # Expand the whole layer, keeping the shortest meeting point
+        best = None
+        layer = []
+        for state in frontiers[side]:
+            if prune is not None and prune(state, depths[side][state], side):
+                continue
+            num_explored += 1
+            if budget is not None and num_explored > budget:
+                raise BudgetExceeded(f"explored more than {budget} states")
+            depth = depths[side][state] + 1
+            for action, neighbor in neighbors_for(state):
+                if neighbor in parents[side]:
+                    continue
+                parents[side][neighbor] = (action, state)
+                depths[side][neighbor] = depth
+                layer.append(neighbor)
+                if neighbor in depths[other]:
+                    length = depth + depths[other][neighbor]
+                    if best is None or length < best[0]:
+                        best = (length, neighbor)
+
+        if best is not None:
+            return _join_paths(parents, best[1])
+        frontiers[side] = layer
+
+    return None
+
+
+def _join_paths(parents, meeting):
+    """
+    Joins the source and target half-paths that meet at `meeting`.
+    """
+    solution = _tree_path(parents[0], meeting)
+
+    state = meeting
+    while parents[1][state] is not None:
+        action, following = parents[1][state]
+        solution.append((action, following))
+        state = following
+    return solution
+
+
+def _tree_path(parents, state):
+    """
+    Returns the path from the root of a search tree to `state`.
+    """
+    solution = []
+    while parents[state] is not None:
+        action, previous = parents[state]
+        solution.append((action, state))
+        state = previous
+    solution.reverse()
+    return solution
+
+
+def shortest_paths(source, targets):
+    """
+    Returns a dictionary mapping each of `targets` to the shortest list
+    of (movie_id, person_id) pairs that connect the source to it, or to
+    None if there is no possible path.
+
+    All targets are answered from a single breadth-first search tree.
+    """
+    if graph is None:
+        return _search_tree(source, targets, neighbors_for_person)
+
+    paths = _search_tree(
+        graph.person_index[source],
+        [graph.person_index[target] for target in targets],
+        graph.neighbors
+    )
+    return {
+        graph.person_ids[target]: None if path is None else [
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path
+        ]
+        for target, path in paths.items()
+    }
+
+
+def _search_tree(source, targets, neighbors_for):
+    """
+    Grows a breadth-first search tree from source until every target
+    is reached, and returns the path to each target.
+    """
+    remaining = set(targets)
+    remaining.discard(source)
+    parents = {source: None}
+    layer = [source]
+    while layer and remaining:
+        next_layer = []
+        for state in layer:
+            for action, neighbor in neighbors_for(state):
+                if neighbor not in parents:
+                    parents[neighbor] = (action, state)
+                    next_layer.append(neighbor)
+                    remaining.discard(neighbor)
+        layer = next_layer
+
+    return {
+        target: _tree_path(parents, target) if target in parents else None
+        for target in targets
+    }
+
+
+def person_id_for_name(name, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If `interactive` is false, returns None instead of prompting
+    when the name is ambiguous.
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
+        if not interactive:
+            return None
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -179,11 +776,31 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def find_people(name, limit=10, max_distance=2):
+    """
+    Returns up to `limit` candidate people for a name without prompting,
+    ranked as exact, then prefix, then fuzzy matches within
+    `max_distance` edits. Each candidate is a dictionary of
+    id, name, birth and edit distance.
+    """
+    global name_index
+
+    if name_index is None:
+        name_index = NameIndex(people)
+    return name_index.search(name, limit, max_distance)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return {
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in graph.neighbors(graph.person_index[person_id])
+        }
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
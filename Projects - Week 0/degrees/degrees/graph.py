@@ -0,0 +1,168 @@
+from array import array
+from collections.abc import Mapping
+
+
+class Graph():
+    """
+    Compact representation of the person/movie graph.
+
+    String ids are interned to dense integers and adjacency is stored
+    in CSR form: `person_offsets[i]:person_offsets[i + 1]` slices
+    `person_movies` to give the movies of person `i`, and likewise
+    `movie_offsets` / `movie_people` give the stars of a movie.
+    """
+
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_people,
+                 person_index=None, movie_index=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        if person_index is None:
+            person_index = _index(person_ids)
+        if movie_index is None:
+            movie_index = _index(movie_ids)
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+    @classmethod
+    def from_edges(cls, person_ids, movie_ids, edge_people, edge_movies,
+                   person_index=None, movie_index=None):
+        """
+        Builds a graph from parallel arrays of (person index, movie index)
+        edges. Duplicate edges are dropped. The id-to-index dictionaries
+        are built unless passed in.
+        """
+        person_offsets, person_movies = _csr(
+            len(person_ids), edge_people, edge_movies
+        )
+
+        # Drop duplicate credits so each person lists a movie once
+        deduped = array("I")
+        offsets = array("I", [0])
+        for i in range(len(person_ids)):
+            row = sorted(set(
+                person_movies[person_offsets[i]:person_offsets[i + 1]]
+            ))
+            deduped.extend(row)
+            offsets.append(len(deduped))
+        person_offsets, person_movies = offsets, deduped
+
+        # Movie side is the transpose of the (deduplicated) person side
+        edge_people = array("I")
+        for i in range(len(person_ids)):
+            edge_people.extend(
+                [i] * (person_offsets[i + 1] - person_offsets[i])
+            )
+        movie_offsets, movie_people = _csr(
+            len(movie_ids), person_movies, edge_people
+        )
+
+        return cls(person_ids, movie_ids,
+                   person_offsets, person_movies,
+                   movie_offsets, movie_people,
+                   person_index, movie_index)
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Builds a graph from the `people` and `movies` dictionaries
+        produced by `degrees.load_data`.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        movie_index = _index(movie_ids)
+        edge_people = array("I")
+        edge_movies = array("I")
+        for i, person_id in enumerate(person_ids):
+            for movie_id in people[person_id]["movies"]:
+                edge_people.append(i)
+                edge_movies.append(movie_index[movie_id])
+        return cls.from_edges(person_ids, movie_ids, edge_people, edge_movies,
+                              movie_index=movie_index)
+
+    def movies_for(self, person):
+        """
+        Returns the movie indices for a person index.
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_for(self, movie):
+        """
+        Returns the person indices for a movie index.
+        """
+        return self.movie_people[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors(self, person):
+        """
+        Yields (movie index, person index) pairs for people who starred
+        with the given person index, including the person themselves.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for k in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[k]
+            for n in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_people[n]
+
+
+class Records(Mapping):
+    """
+    Read-only mapping from ids to records, stored as one list per field
+    indexed by the ids' dense integers instead of a dictionary per id.
+
+    Looking up an id returns a new dictionary of its fields, so code
+    written for dictionaries of dictionaries can read it unchanged.
+    """
+
+    def __init__(self, index, **fields):
+        self.index = index
+        self.fields = fields
+
+    def __getitem__(self, key):
+        i = self.index[key]
+        return {name: values[i] for name, values in self.fields.items()}
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+
+def _index(ids):
+    """
+    Returns a dictionary mapping each id to its position in `ids`.
+    """
+    return {key: i for i, key in enumerate(ids)}
+
+
+def _csr(rows, edge_rows, edge_cols):
+    """
+    Counting sort of (row, col) edges into CSR offsets and indices.
+    """
+    offsets = array("I", [0] * (rows + 1))
+    for row in edge_rows:
+        offsets[row + 1] += 1
+    for i in range(rows):
+        offsets[i + 1] += offsets[i]
+
+    indices = array("I", [0] * len(edge_rows))
+    cursor = array("I", offsets[:-1])
+    for row, col in zip(edge_rows, edge_cols):
+        indices[cursor[row]] = col
+        cursor[row] += 1
+    return offsets, indices
@@ -0,0 +1,140 @@
+from array import array
+from bisect import bisect_left
+
+
+class NameIndex():
+    """
+    Index of people's names supporting exact, prefix and fuzzy lookups.
+
+    Lowercased names are kept in a sorted list for exact and prefix
+    lookups, and each name's trigrams are indexed to find candidates
+    within a bounded edit distance.
+    """
+
+    def __init__(self, people):
+        self.people = people
+
+        # Sorted lowercase names and the person ids sharing each name
+        ids = {}
+        for person_id, person in people.items():
+            ids.setdefault(person["name"].lower(), []).append(person_id)
+        self.keys = sorted(ids)
+        self.ids = [ids[key] for key in self.keys]
+
+        # Maps each trigram to the indices of the names containing it
+        self.trigrams = {}
+        for i, key in enumerate(self.keys):
+            for trigram in set(_trigrams(key)):
+                if trigram not in self.trigrams:
+                    self.trigrams[trigram] = array("I")
+                self.trigrams[trigram].append(i)
+
+    def exact(self, name):
+        """
+        Returns the indices of names equal to `name`, ignoring case.
+        """
+        name = name.lower()
+        i = bisect_left(self.keys, name)
+        if i < len(self.keys) and self.keys[i] == name:
+            return [i]
+        return []
+
+    def prefix(self, name, limit=None):
+        """
+        Returns the indices of names starting with `name`, ignoring case,
+        in alphabetical order.
+        """
+        name = name.lower()
+        matches = []
+        i = bisect_left(self.keys, name)
+        while i < len(self.keys) and self.keys[i].startswith(name):
+            if limit is not None and len(matches) >= limit:
+                break
+            matches.append(i)
+            i += 1
+        return matches
+
+    def fuzzy(self, name, max_distance=2):
+        """
+        Returns (distance, index) pairs for names within `max_distance`
+        edits of `name`, ignoring case, closest first.
+        """
+        name = name.lower()
+        grams = set(_trigrams(name))
+
+        # Each edit changes at most three trigrams, so any match must
+        # share this many distinct trigrams with the query
+        needed = max(1, len(grams) - 3 * max_distance)
+        shared = {}
+        for trigram in grams:
+            for i in self.trigrams.get(trigram, ()):
+                shared[i] = shared.get(i, 0) + 1
+
+        matches = []
+        for i, count in shared.items():
+            if count < needed:
+                continue
+            distance = _edit_distance(name, self.keys[i], max_distance)
+            if distance is not None:
+                matches.append((distance, i))
+        matches.sort(key=lambda match: (match[0], self.keys[match[1]]))
+        return matches
+
+    def search(self, name, limit=10, max_distance=2):
+        """
+        Returns up to `limit` ranked candidates for `name`: exact matches,
+        then prefix matches, then fuzzy matches by edit distance.
+
+        Each candidate is a dictionary of id, name, birth and the edit
+        distance from `name` (None for prefix matches).
+        """
+        ranked = [(0, i) for i in self.exact(name)]
+        ranked.extend((None, i) for i in self.prefix(name, limit + 1))
+        ranked.extend(self.fuzzy(name, max_distance))
+
+        candidates = []
+        seen = set()
+        for distance, i in ranked:
+            for person_id in self.ids[i]:
+                if person_id in seen:
+                    continue
+                seen.add(person_id)
+                person = self.people[person_id]
+                candidates.append({
+                    "id": person_id,
+                    "name": person["name"],
+                    "birth": person["birth"],
+                    "distance": distance
+                })
+                if len(candidates) >= limit:
+                    return candidates
+        return candidates
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _edit_distance(a, b, bound):
+    """
+    Returns the Levenshtein distance between two strings,
+    or None if it is greater than `bound`.
+    """
+    if abs(len(a) - len(b)) > bound:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if min(current) > bound:
+            return None
+        previous = current
+    if previous[-1] > bound:
+        return None
+    return previous[-1]
@@ -0,0 +1,183 @@
+import json
+import math
+import os
+import struct
+import sys
+from array import array
+
+# Bump whenever the file layout changes
+VERSION = 2
+
+MAGIC = b"DEGORCL\0"
+FILENAME = "degrees.oracle"
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+
+class Oracle():
+    """
+    Landmark-based distance oracle.
+
+    Stores the breadth-first distance from each of a few landmark people
+    to every person, and bounds the distance between any two people by
+    the triangle inequality.
+    """
+
+    def __init__(self, person_ids, landmarks, distances):
+        self.person_ids = person_ids
+        self.index = {person_id: i for i, person_id in enumerate(person_ids)}
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, person_ids, neighbors_for, degree, k=16):
+        """
+        Builds an oracle over people indexed 0..n-1, using the `k` people
+        with the highest `degree` as landmarks. `neighbors_for(i)` yields
+        (action, j) pairs for the neighbors of person `i`.
+        """
+        count = len(person_ids)
+        landmarks = sorted(range(count), key=degree, reverse=True)[:k]
+        distances = [_distances_from(landmark, count, neighbors_for)
+                     for landmark in landmarks]
+        return cls(person_ids, [person_ids[i] for i in landmarks], distances)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        two person ids. Both are `math.inf` if a landmark shows that the
+        people are not connected; `upper` is `math.inf` if no landmark
+        reaches them.
+        """
+        return self.bounds_for(self.column(source), self.column(target))
+
+    def column(self, person_id):
+        """
+        Returns the landmark distances of a person id.
+        """
+        i = self.index[person_id]
+        return [distances[i] for distances in self.distances]
+
+    def bounds_for(self, first, second):
+        """
+        Returns (lower, upper) bounds between two landmark distance columns.
+        """
+        lower = 0
+        upper = math.inf
+        for a, b in zip(first, second):
+            if a == UNREACHABLE and b == UNREACHABLE:
+                continue
+            if a == UNREACHABLE or b == UNREACHABLE:
+                return math.inf, math.inf
+            lower = max(lower, abs(a - b))
+            upper = min(upper, a + b)
+        return lower, upper
+
+    def save(self, path, sources=None):
+        """
+        Writes the oracle to `path`, recording `sources`, the signature
+        of the data it was built from (see snapshot.source_signature).
+        """
+        header = json.dumps({
+            "version": VERSION,
+            "count": len(self.person_ids),
+            "landmarks": self.landmarks,
+            "sources": sources
+        }).encode("utf-8")
+        ids = "\0".join(self.person_ids).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<II", len(header), len(ids)))
+            f.write(header)
+            f.write(ids)
+            for distances in self.distances:
+                f.write(distances.tobytes())
+
+    @classmethod
+    def load(cls, path, sources=None):
+        """
+        Reads an oracle written by `save`, or returns None if `path` does
+        not hold one or, when `sources` is given, if it was built from
+        data with a different signature.
+        """
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            with f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return None
+                header_size, ids_size = struct.unpack("<II", f.read(8))
+                header = json.loads(f.read(header_size).decode("utf-8"))
+                if header["version"] != VERSION:
+                    return None
+                if sources is not None and header["sources"] != sources:
+                    return None
+                count = header["count"]
+                ids = f.read(ids_size).decode("utf-8")
+                person_ids = ids.split("\0") if count else []
+                distances = []
+                for _ in header["landmarks"]:
+                    column = array("B")
+                    column.frombytes(f.read(count))
+                    if len(column) != count:
+                        return None
+                    distances.append(column)
+        except (ValueError, KeyError, OSError, struct.error):
+            return None
+        if len(person_ids) != count:
+            return None
+        return cls(person_ids, header["landmarks"], distances)
+
+
+def _distances_from(root, count, neighbors_for):
+    """
+    Returns breadth-first distances from `root` to every index.
+    """
+    distances = array("B", [UNREACHABLE]) * count
+    distances[root] = 0
+    layer = [root]
+    depth = 0
+    while layer:
+        depth += 1
+        if depth >= UNREACHABLE:
+            raise ValueError("distance too large for oracle")
+        next_layer = []
+        for state in layer:
+            for _, neighbor in neighbors_for(state):
+                if distances[neighbor] == UNREACHABLE:
+                    distances[neighbor] = depth
+                    next_layer.append(neighbor)
+        layer = next_layer
+    return distances
+
+
+def oracle_path(directory):
+    """
+    Returns the path of the oracle file for a data directory.
+    """
+    return os.path.join(directory, FILENAME)
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python oracle.py directory [landmarks]")
+    directory = sys.argv[1]
+    k = int(sys.argv[2]) if len(sys.argv) == 3 else 16
+
+    import degrees
+    from snapshot import source_signature
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    print("Building oracle...")
+    oracle = degrees.build_oracle(k)
+    oracle.save(oracle_path(directory), source_signature(directory))
+    print(f"Saved {len(oracle.landmarks)} landmarks to "
+          f"{oracle_path(directory)}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+from batch import init_worker
+
+USAGE = ("Usage: python server.py directory [--port N | --socket PATH] "
+         "[--workers N] [--max-searches N] [--budget N] [--compact] "
+         "[--oracle]")
+
+# Upper bounds, in milliseconds, of the latency histogram buckets
+BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error"
+}
+
+
+class Histogram():
+    """
+    Counts request latencies in fixed millisecond buckets.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+
+    def add(self, seconds):
+        milliseconds = seconds * 1000
+        self.total += milliseconds
+        for i, bound in enumerate(BUCKETS):
+            if milliseconds <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def report(self):
+        count = sum(self.counts)
+        buckets = {f"<={bound}ms": n for bound, n in zip(BUCKETS, self.counts)}
+        buckets[f">{BUCKETS[-1]}ms"] = self.counts[-1]
+        return {
+            "count": count,
+            "mean_ms": self.total / count if count else None,
+            "buckets": buckets
+        }
+
+
+class Server():
+    """
+    Answers degrees queries over HTTP from data loaded once in memory.
+
+    Searches run in a process pool, at most `max_searches` at a time,
+    each exploring at most `budget` states.
+    """
+
+    def __init__(self, directory, compact=False, workers=None,
+                 max_searches=4, budget=None):
+        self.budget = budget
+        self.searches = asyncio.Semaphore(max_searches)
+        self.pool = ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=(directory, compact)
+        )
+        self.latencies = {}
+        self.routes = {
+            "/path": self.path,
+            "/names": self.names,
+            "/stats": self.stats
+        }
+
+    async def handle(self, reader, writer):
+        """
+        Serves a single HTTP request on a connection.
+        """
+        start = time.perf_counter()
+        route = None
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            try:
+                method, target, _ = request.decode("latin-1").split(" ", 2)
+            except ValueError:
+                status, body = 400, {"error": "malformed request"}
+            else:
+                url = urlsplit(target)
+                route = url.path
+                query = {key: values[-1]
+                         for key, values in parse_qs(url.query).items()}
+                if method != "GET":
+                    status, body = 405, {"error": "only GET is supported"}
+                elif route not in self.routes:
+                    status, body = 404, {"error": f"no route {route}"}
+                else:
+                    try:
+                        status, body = await self.routes[route](query)
+                    except Exception as e:
+                        print(f"Error handling {route}: {e!r}",
+                              file=sys.stderr)
+                        status, body = 500, {"error": "internal error"}
+            payload = json.dumps(body).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1") + payload
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+            if route in self.routes:
+                self.latencies.setdefault(route, Histogram()).add(
+                    time.perf_counter() - start
+                )
+
+    async def path(self, query):
+        """
+        Returns the shortest path between the `source` and `target` ids.
+        """
+        source = query.get("source")
+        target = query.get("target")
+        if source is None or target is None:
+            return 400, {"error": "missing source or target"}
+        for person_id in [source, target]:
+            if person_id not in degrees.people:
+                return 404, {"error": f"person not found: {person_id}"}
+
+        loop = asyncio.get_running_loop()
+        async with self.searches:
+            try:
+                path = await loop.run_in_executor(
+                    self.pool, search, source, target, self.budget
+                )
+            except degrees.BudgetExceeded as e:
+                return 422, {"error": str(e)}
+
+        return 200, {
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path
+        }
+
+    async def names(self, query):
+        """
+        Returns ranked candidates for the name `q`.
+        """
+        if "q" not in query:
+            return 400, {"error": "missing q"}
+        try:
+            limit = int(query.get("limit", 10))
+        except ValueError:
+            return 400, {"error": "limit must be an integer"}
+        loop = asyncio.get_running_loop()
+        candidates = await loop.run_in_executor(
+            None, degrees.find_people, query["q"], limit
+        )
+        return 200, {"candidates": candidates}
+
+    async def stats(self, query):
+        """
+        Returns latency histograms per route.
+        """
+        return 200, {
+            route: histogram.report()
+            for route, histogram in self.latencies.items()
+        }
+
+
+def search(source, target, budget):
+    """
+    Runs a bidirectional search in a pool worker.
+    """
+    return degrees.shortest_path(source, target, bidirectional=True,
+                                 budget=budget)
+
+
+async def fetch(target, host="127.0.0.1", port=8000, socket_path=None):
+    """
+    Minimal client: sends a GET request for `target` to a running server
+    and returns the (status, body) of its response.
+    """
+    if socket_path is not None:
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n"
+                 .encode("latin-1"))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    return status, json.loads(payload.decode("utf-8"))
+
+
+async def serve(directory, port=8000, socket_path=None, oracle=False,
+                **options):
+    """
+    Loads the data and serves requests until cancelled, using the saved
+    oracle only if `oracle` is true.
+    """
+    print("Loading data...")
+    degrees.load_data(directory, compact=options.get("compact", False))
+    if oracle:
+        degrees.load_oracle(directory)
+
+    # Build the name index now rather than on the first lookup
+    degrees.find_people("")
+    print("Data loaded.")
+
+    # Start the workers before accepting connections, so that forked
+    # workers do not inherit (and hold open) client sockets
+    server = Server(directory, **options)
+    await asyncio.get_running_loop().run_in_executor(server.pool, int)
+
+    if socket_path is not None:
+        listener = await asyncio.start_unix_server(server.handle, socket_path)
+        print(f"Serving on {socket_path}")
+    else:
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", port)
+        print(f"Serving on http://127.0.0.1:{port}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.pool.shutdown(cancel_futures=True)
+
+
+def main():
+    args = sys.argv[1:]
+    options = {"--port": "8000", "--socket": None, "--workers": None,
+               "--max-searches": "4", "--budget": None}
+    for option in options:
+        if option in args:
+            i = args.index(option)
+            if i + 1 >= len(args):
+                sys.exit(USAGE)
+            options[option] = args[i + 1]
+            del args[i:i + 2]
+    flags = {flag: flag in args for flag in ["--compact", "--oracle"]}
+    for flag, present in flags.items():
+        if present:
+            args.remove(flag)
+    if len(args) != 1:
+        sys.exit(USAGE)
+
+    try:
+        asyncio.run(serve(
+            args[0],
+            port=int(options["--port"]),
+            socket_path=options["--socket"],
+            oracle=flags["--oracle"],
+            compact=flags["--compact"],
+            workers=int(options["--workers"]) if options["--workers"] else None,
+            max_searches=int(options["--max-searches"]),
+            budget=int(options["--budget"]) if options["--budget"] else None
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
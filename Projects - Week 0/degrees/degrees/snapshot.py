@@ -0,0 +1,181 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from graph import Graph, Records
+
+# Bump whenever the layout below changes
+VERSION = 2
+
+MAGIC = b"DEGSNAP\0"
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people")
+STRINGS = ("person_ids", "names", "births", "movie_ids", "titles", "years")
+
+
+def snapshot_path(directory):
+    """
+    Returns the path of the snapshot file for a data directory.
+    """
+    return os.path.join(directory, FILENAME)
+
+
+def source_signature(directory):
+    """
+    Returns the size and modification time of each CSV file, used to
+    detect when a snapshot is out of date.
+    """
+    signature = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        signature[name] = [stat.st_size, stat.st_mtime_ns]
+    return signature
+
+
+def write_snapshot(directory, graph, people, movies):
+    """
+    Writes `graph` and the people/movie string tables to the snapshot
+    file of `directory`.
+
+    The file is the magic bytes, a length-prefixed JSON header, then
+    each section aligned to 8 bytes. Adjacency arrays are stored as raw
+    native uint32 so they can be memory-mapped back without parsing.
+    The header records each section's offset, size and CRC32.
+    """
+    sections = {name: getattr(graph, name) for name in ARRAYS}
+    tables = {
+        "person_ids": graph.person_ids,
+        "names": [people[i]["name"] for i in graph.person_ids],
+        "births": [people[i]["birth"] for i in graph.person_ids],
+        "movie_ids": graph.movie_ids,
+        "titles": [movies[i]["title"] for i in graph.movie_ids],
+        "years": [movies[i]["year"] for i in graph.movie_ids]
+    }
+    for name, strings in tables.items():
+        sections[name] = "\0".join(strings).encode("utf-8")
+
+    # Lay out sections after the header
+    header = {
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "itemsize": array("I").itemsize,
+        "sources": source_signature(directory),
+        "sections": {}
+    }
+    blobs = []
+    offset = 0
+    for name, data in sections.items():
+        blob = data.tobytes() if isinstance(data, array) else data
+        header["sections"][name] = [offset, len(blob), zlib.crc32(blob)]
+        blobs.append(blob)
+        offset += len(blob) + _padding(len(blob))
+
+    encoded = json.dumps(header).encode("utf-8")
+    start = len(MAGIC) + 4 + len(encoded)
+    start += _padding(start)
+
+    # Write to a temporary file so readers never see a partial snapshot
+    path = snapshot_path(directory)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(encoded)))
+        f.write(encoded)
+        f.write(b"\0" * (start - f.tell()))
+        for blob in blobs:
+            f.write(blob)
+            f.write(b"\0" * _padding(len(blob)))
+    os.replace(tmp, path)
+
+
+def read_snapshot(directory):
+    """
+    Memory-maps the snapshot of `directory`.
+
+    Returns a (graph, people, movies) tuple, where `people` and `movies`
+    are `Records` of name/birth and title/year, or None if there is no
+    usable snapshot for the current CSV files, including when the file
+    is truncated or corrupt.
+
+    Only the adjacency arrays are used in place; the string tables are
+    still decoded, so a load takes time proportional to the data rather
+    than milliseconds, and callers that want dictionaries and sets
+    (compact=False) rebuild them on top of that.
+    """
+    path = snapshot_path(directory)
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    try:
+        with f:
+            return _parse(f, directory)
+    except (ValueError, TypeError, KeyError, OSError, struct.error):
+        return None
+
+
+def _parse(f, directory):
+    """
+    Reads an open snapshot file. Raises an exception if it is malformed.
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        return None
+    (length,) = struct.unpack("<I", f.read(4))
+    header = json.loads(f.read(length).decode("utf-8"))
+    if (header.get("version") != VERSION
+            or header.get("byteorder") != sys.byteorder
+            or header.get("itemsize") != array("I").itemsize
+            or header.get("sources") != source_signature(directory)):
+        return None
+    start = len(MAGIC) + 4 + length
+    start += _padding(start)
+    buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def section(name):
+        offset, size, crc = header["sections"][name]
+        if offset < 0 or size < 0 or start + offset + size > len(buffer):
+            raise ValueError(f"section {name} out of bounds")
+        data = buffer[start + offset:start + offset + size]
+        if zlib.crc32(data) != crc:
+            raise ValueError(f"section {name} is corrupt")
+        return data
+
+    arrays = {}
+    for name in ARRAYS:
+        data = section(name)
+        if len(data) % array("I").itemsize:
+            raise ValueError(f"section {name} has a partial item")
+        arrays[name] = data.cast("I")
+    counts = {
+        "person": len(arrays["person_offsets"]) - 1,
+        "movie": len(arrays["movie_offsets"]) - 1
+    }
+    for kind, indices in [("person", "person_movies"),
+                          ("movie", "movie_people")]:
+        offsets = arrays[f"{kind}_offsets"]
+        if counts[kind] < 0 or offsets[-1] != len(arrays[indices]):
+            raise ValueError(f"section {kind}_offsets does not match")
+    tables = {}
+    for name in STRINGS:
+        data = section(name).tobytes().decode("utf-8")
+        kind = "person" if name in STRINGS[:3] else "movie"
+        tables[name] = data.split("\0") if counts[kind] else []
+        if len(tables[name]) != counts[kind]:
+            raise ValueError(f"section {name} has the wrong length")
+
+    graph = Graph(tables["person_ids"], tables["movie_ids"], **arrays)
+    people = Records(graph.person_index,
+                     name=tables["names"], birth=tables["births"])
+    movies = Records(graph.movie_index,
+                     title=tables["titles"], year=tables["years"])
+    return graph, people, movies
+
+
+def _padding(size):
+    return -size % 8
@@ -0,0 +1,60 @@
+import csv
+import itertools
+import os
+import random
+import sys
+
+
+def generate(directory, num_people, num_movies, stars_per_movie=4, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv for a random graph to
+    `directory`, in the same format as the IMDb datasets.
+
+    Casting favours a few prolific people, as in the real data, so the
+    graph has well-connected hubs and a long tail of minor actors.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(f"{directory}/people.csv", "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(num_people):
+            writer.writerow([i + 1, f"Person {i + 1}", rng.randint(1920, 2005)])
+
+    with open(f"{directory}/movies.csv", "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(num_movies):
+            writer.writerow([i + 1, f"Movie {i + 1}", rng.randint(1930, 2020)])
+
+    people = range(1, num_people + 1)
+    weights = list(itertools.accumulate(
+        rng.paretovariate(1.5) for _ in people
+    ))
+    with open(f"{directory}/stars.csv", "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(1, num_movies + 1):
+            cast = set(rng.choices(people, cum_weights=weights,
+                                   k=stars_per_movie))
+            for person in sorted(cast):
+                writer.writerow([person, movie])
+
+
+def main():
+    if len(sys.argv) not in [4, 5]:
+        sys.exit("Usage: python synthetic.py directory people movies "
+                 "[stars_per_movie]")
+    directory = sys.argv[1]
+    num_people = int(sys.argv[2])
+    num_movies = int(sys.argv[3])
+    stars_per_movie = int(sys.argv[4]) if len(sys.argv) == 5 else 4
+    generate(directory, num_people, num_movies, stars_per_movie)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +10,17 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+
+        # Maps each state to the number of nodes in the frontier holding it
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +29,17 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._discard(node)
             return node
 
+    def _discard(self, node):
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +47,34 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self._discard(node)
             return node
+
+
+class SearchStats():
+    """
+    Counters describing the work done by a single search.
+    """
+
+    def __init__(self):
+        self.explored = 0
+        self.generated = 0
+        self.max_frontier = 0
+        self.neighbor_time = 0.0
+        self.wall_time = 0.0
+
+    def expansions_per_second(self):
+        if self.wall_time == 0:
+            return None
+        return self.explored / self.wall_time
+
+    def as_dict(self):
+        return {
+            "explored": self.explored,
+            "generated": self.generated,
+            "max_frontier": self.max_frontier,
+            "neighbor_time": self.neighbor_time,
+            "wall_time": self.wall_time,
+            "expansions_per_second": self.expansions_per_second()
+        }
@@ -0,0 +1,211 @@
+"""
+Batch position evaluation and parallel self-play for Tic Tac Toe.
+
+Boards are encoded as integers x << 9 | o, where x and o are the
+bitboards of bitboard.py, so many positions fit in one NumPy array.
+"""
+import multiprocessing
+import random
+import sys
+import time
+
+import numpy as np
+
+import bitboard
+import tictactoe as ttt
+from solve import reachable
+
+# Per-bitboard lookup tables, indexed by a 9-bit set of cells
+WINNING = np.array(bitboard.WINNING, dtype=bool)
+POPCOUNT = np.array(bitboard.POPCOUNT, dtype=np.int8)
+
+# Value stored for encodings that are not reachable positions
+UNREACHABLE = -128
+
+AGENTS = ["ai", "random"]
+
+# Game-theoretic values of every encoding, built on first use
+values_table = None
+
+
+def encode(board):
+    """
+    Returns the integer encoding of a list-of-lists board.
+    """
+    x, o = bitboard.from_board(board)
+    return x << 9 | o
+
+
+def encode_many(boards):
+    """
+    Returns an array of encodings for a sequence of boards.
+    """
+    return np.array([encode(board) for board in boards], dtype=np.int32)
+
+
+def decode(code):
+    """
+    Returns the list-of-lists board for an encoding.
+    """
+    return bitboard.to_board(code >> 9, code & bitboard.FULL)
+
+
+def split(codes):
+    """
+    Returns the x and o bitboard arrays of an array of encodings.
+    """
+    codes = np.asarray(codes)
+    return codes >> 9, codes & bitboard.FULL
+
+
+def winners(codes):
+    """
+    Returns an array holding 1 where X has won, -1 where O has won and
+    0 elsewhere, for an array of encodings.
+    """
+    x, o = split(codes)
+    return WINNING[x].astype(np.int8) - WINNING[o].astype(np.int8)
+
+
+def terminals(codes):
+    """
+    Returns a boolean array of which encoded games are over.
+    """
+    x, o = split(codes)
+    return WINNING[x] | WINNING[o] | ((x | o) == bitboard.FULL)
+
+
+def players(codes):
+    """
+    Returns an array holding 1 where X is to move and -1 where O is.
+    """
+    x, o = split(codes)
+    return np.where(POPCOUNT[x] <= POPCOUNT[o], 1, -1).astype(np.int8)
+
+
+def values(codes):
+    """
+    Returns the value with perfect play (1 X wins, 0 draw, -1 O wins) of
+    each encoded position, or UNREACHABLE for impossible positions.
+    """
+    global values_table
+
+    if values_table is None:
+        values_table = np.full(1 << 18, UNREACHABLE, dtype=np.int8)
+        solutions = ttt.load_solutions()
+        for x, o in reachable():
+            key, _ = bitboard.canonical(x, o)
+            if key in solutions:
+                value = solutions[key][1]
+            else:
+                value = ttt.search(x, o, -np.inf, np.inf)
+            values_table[x << 9 | o] = np.sign(value)
+    return values_table[np.asarray(codes)]
+
+
+def play(agents, rng):
+    """
+    Plays one game between two agents ("ai" or "random"), X first.
+    Returns the utility of the final position.
+    """
+    x = o = 0
+    turn = 0
+    while not bitboard.terminal(x, o):
+        if agents[turn] == "ai":
+            i, j = ttt.lookup(x, o) or ttt.minimax(bitboard.to_board(x, o))
+            bit = bitboard.BITS[(i, j)]
+        else:
+            bit = rng.choice(list(bitboard.bits(bitboard.moves(x, o))))
+        x, o = bitboard.result(x, o, bit)
+        turn ^= 1
+    return bitboard.utility(x, o)
+
+
+def _play_many(task):
+    agents, games, seed = task
+    rng = random.Random(seed)
+    counts = [0, 0, 0]
+    for _ in range(games):
+        counts[play(agents, rng) + 1] += 1
+    return counts
+
+
+def self_play(games, x="ai", o="random", processes=None, seed=0):
+    """
+    Plays `games` games between agents in a process pool and returns
+    win/draw/loss counts and throughput.
+    """
+    for agent in [x, o]:
+        if agent not in AGENTS:
+            raise ValueError(f"unknown agent {agent}")
+    processes = processes or multiprocessing.cpu_count()
+    chunks = [games // processes + (i < games % processes)
+              for i in range(processes)]
+    tasks = [((x, o), chunk, seed + i)
+             for i, chunk in enumerate(chunks) if chunk]
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        counts = [0, 0, 0]
+        for o_wins, draws, x_wins in pool.imap_unordered(_play_many, tasks):
+            counts[0] += o_wins
+            counts[1] += draws
+            counts[2] += x_wins
+    seconds = time.perf_counter() - start
+    return {
+        "games": games,
+        "x_wins": counts[2],
+        "draws": counts[1],
+        "o_wins": counts[0],
+        "seconds": seconds,
+        "games_per_second": games / seconds if seconds else None
+    }
+
+
+def benchmark(positions, seed=0):
+    """
+    Evaluates `positions` random encodings with each batch function and
+    returns positions per second for each.
+    """
+    rng = np.random.default_rng(seed)
+    codes = rng.integers(0, 1 << 18, size=positions, dtype=np.int32)
+    rates = {}
+    for function in [winners, terminals, players, values]:
+        function(codes[:1])
+        start = time.perf_counter()
+        function(codes)
+        seconds = time.perf_counter() - start
+        rates[function.__name__] = positions / seconds if seconds else None
+    return rates
+
+
+def main():
+    args = sys.argv[1:]
+    options = {"--x": "ai", "--o": "random", "--processes": None,
+               "--positions": "1000000"}
+    for option in list(options):
+        if option in args:
+            i = args.index(option)
+            if i + 1 >= len(args):
+                sys.exit("Usage: python batch.py [games] [--x AGENT] "
+                         "[--o AGENT] [--processes N] [--positions N]")
+            options[option] = args[i + 1]
+            del args[i:i + 2]
+    games = int(args[0]) if args else 1000
+    processes = options["--processes"]
+
+    stats = self_play(games, options["--x"], options["--o"],
+                      int(processes) if processes else None)
+    print(f"{stats['games']} games of {options['--x']} (X) against "
+          f"{options['--o']} (O) in {stats['seconds']:.2f}s "
+          f"({stats['games_per_second']:.0f} games/s)")
+    print(f"    X wins: {stats['x_wins']}  Draws: {stats['draws']}  "
+          f"O wins: {stats['o_wins']}")
+
+    print("Batch evaluation (positions/s)")
+    for name, rate in benchmark(int(options["--positions"])).items():
+        print(f"    {name:<10} {rate:14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Bitboard representation of Tic Tac Toe positions.
+
+A position is a pair of 9-bit integers (x, o) holding the cells taken by
+each player, where cell (i, j) is bit 3 * i + j.
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# Masks of the eight winning lines
+LINES = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+]
+
+# Whether each of the 512 possible sets of cells contains a line
+WINNING = [any(mask & line == line for line in LINES)
+           for mask in range(FULL + 1)]
+
+# Number of cells in each of the 512 possible sets of cells
+POPCOUNT = [bin(mask).count("1") for mask in range(FULL + 1)]
+
+# The (i, j) action for each single-cell mask, and vice versa
+ACTIONS = {1 << (3 * i + j): (i, j) for i in range(3) for j in range(3)}
+BITS = {action: bit for bit, action in ACTIONS.items()}
+
+
+def from_board(board):
+    """
+    Returns the (x, o) bitboards for a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (3 * i + j)
+            elif cell == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list-of-lists board for (x, o) bitboards.
+    """
+    board = []
+    for i in range(3):
+        row = []
+        for j in range(3):
+            bit = 1 << (3 * i + j)
+            row.append(X if x & bit else O if o & bit else EMPTY)
+        board.append(row)
+    return board
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn.
+    """
+    return X if POPCOUNT[x] <= POPCOUNT[o] else O
+
+
+def moves(x, o):
+    """
+    Returns the mask of empty cells.
+    """
+    return FULL & ~(x | o)
+
+
+def bits(mask):
+    """
+    Yields each single-cell mask set in `mask`, lowest first.
+    """
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+
+def actions(x, o):
+    """
+    Returns set of all possible actions (i, j) available.
+    """
+    return {ACTIONS[bit] for bit in bits(moves(x, o))}
+
+
+def result(x, o, bit):
+    """
+    Returns the (x, o) bitboards after the player to move takes the cell
+    given by the single-cell mask `bit`.
+    """
+    if (x | o) & bit:
+        raise ValueError("Invalid action")
+    if POPCOUNT[x] <= POPCOUNT[o]:
+        return x | bit, o
+    return x, o | bit
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return WINNING[x] or WINNING[o] or (x | o) == FULL
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def _transform(mask, cells):
+    """
+    Returns `mask` with the cell at index cells[k] moved to index k.
+    """
+    moved = 0
+    for k, cell in enumerate(cells):
+        if mask >> cell & 1:
+            moved |= 1 << k
+    return moved
+
+
+# Cell permutations for the 8 symmetries of the board (rotations and
+# reflections), as the source cell of each destination cell
+SYMMETRIES = []
+for _cells in [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8],
+    [6, 3, 0, 7, 4, 1, 8, 5, 2],
+    [8, 7, 6, 5, 4, 3, 2, 1, 0],
+    [2, 5, 8, 1, 4, 7, 0, 3, 6]
+]:
+    SYMMETRIES.append(_cells)
+    SYMMETRIES.append([_cells[3 * i + 2 - j]
+                       for i in range(3) for j in range(3)])
+
+# Lookup tables applying each symmetry to any set of cells
+TRANSFORMS = [[_transform(mask, cells) for mask in range(FULL + 1)]
+              for cells in SYMMETRIES]
+
+
+def canonical(x, o):
+    """
+    Returns a key identifying (x, o) up to rotation and reflection,
+    and the index of the symmetry mapping (x, o) to its canonical form.
+    """
+    best = None
+    best_symmetry = 0
+    for i, table in enumerate(TRANSFORMS):
+        key = table[x] << 9 | table[o]
+        if best is None or key < best:
+            best = key
+            best_symmetry = i
+    return best, best_symmetry
@@ -0,0 +1,388 @@
+"""
+Generalised m,n,k game player: an m x n board where the first player to
+get k in a row (horizontally, vertically or diagonally) wins.
+
+Boards use the same list-of-lists format as tictactoe.py, so a Game can
+stand in for the tictactoe module in runner.py.
+"""
+import random
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a won position; wins found sooner score slightly higher
+WIN = 10 ** 9
+
+# Scores beyond this are wins or losses rather than heuristic estimates
+WON = WIN - 10 ** 4
+
+# Kinds of values stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Clear the transposition table once it holds this many positions
+MAX_TRANSPOSITIONS = 1000000
+
+# How often, in nodes, the search checks its time budget
+CHECK_EVERY = 1024
+
+
+class Timeout(Exception):
+    """
+    Raised inside a search when its time budget runs out or it is cancelled.
+    """
+
+
+class Game():
+    """
+    Rules and AI for one m,n,k game.
+    """
+
+    def __init__(self, m=3, n=3, k=3, time_limit=1.0, seed=0):
+        self.m = m
+        self.n = n
+        self.k = k
+        self.time_limit = time_limit
+        cells = m * n
+
+        # Every line of k cells in which a player could win
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.windows.append(tuple(
+                            (i + di * s) * n + (j + dj * s) for s in range(k)
+                        ))
+        self.cell_windows = [[] for _ in range(cells)]
+        for w, window in enumerate(self.windows):
+            for cell in window:
+                self.cell_windows[cell].append(w)
+
+        # Value of an open window holding c stones of one player only
+        self.weights = [0] + [4 ** c for c in range(1, k)] + [0]
+
+        # Cells nearest the centre first, and the cells near each cell
+        centre = ((m - 1) / 2, (n - 1) / 2)
+        self.central = sorted(range(cells), key=lambda cell: (
+            abs(cell // n - centre[0]) + abs(cell % n - centre[1])
+        ))
+        self.nearby = [
+            [other for other in range(cells)
+             if other != cell
+             and abs(other // n - cell // n) <= 2
+             and abs(other % n - cell % n) <= 2]
+            for cell in range(cells)
+        ]
+
+        # Random keys per (player, cell) for Zobrist hashing
+        rng = random.Random(seed)
+        self.zobrist = [[rng.getrandbits(64) for _ in range(cells)]
+                        for _ in range(2)]
+
+        # Maps position hashes to (depth, value, kind, best cell); values
+        # do not depend on move history, so entries are kept between moves
+        self.transpositions = {}
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x_count = sum(row.count(X) for row in board)
+        o_count = sum(row.count(O) for row in board)
+        return X if x_count <= o_count else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] is EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if board[i][j] is not EMPTY:
+            raise ValueError("Invalid action")
+        new_board = [row[:] for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = [cell for row in board for cell in row]
+        for window in self.windows:
+            first = cells[window[0]]
+            if first is not EMPTY and all(
+                cells[cell] == first for cell in window
+            ):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) is not None
+                or all(cell is not EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1}.get(self.winner(board), 0)
+
+    def minimax(self, board):
+        """
+        Returns the best action found for the current player within the
+        game's time limit.
+        """
+        return self.best_move(board)
+
+    def best_move(self, board, time_limit=None, cancel=None):
+        """
+        Returns the best action for the current player on the board, using
+        iterative-deepening alpha-beta search for up to `time_limit`
+        seconds. Stops early, returning the best action so far, once
+        `cancel.is_set()` is true.
+        """
+        if self.terminal(board):
+            return None
+        if time_limit is None:
+            time_limit = self.time_limit
+        if len(self.transpositions) > MAX_TRANSPOSITIONS:
+            self.transpositions.clear()
+
+        search = Search(self, board, time.perf_counter() + time_limit, cancel)
+        best = search.candidates()[0]
+        for depth in range(1, search.position.empty + 1):
+            try:
+                value, move = search.root(depth)
+            except Timeout:
+                break
+            best = move
+            if abs(value) >= WON:
+                break
+        return divmod(best, self.n)
+
+
+class Position():
+    """
+    Mutable search position, keeping per-window stone counts so that moves
+    update the heuristic score, the hash and the win state incrementally.
+    """
+
+    def __init__(self, game, board):
+        self.game = game
+        self.cells = [None] * (game.m * game.n)
+        self.counts = [[0] * len(game.windows), [0] * len(game.windows)]
+        self.score = 0
+        self.hash = 0
+        self.won = False
+        self.history = []
+        stones = [0, 0]
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell is not EMPTY:
+                    player = 0 if cell == X else 1
+                    self.place(i * game.n + j, player)
+                    stones[player] += 1
+        self.turn = 0 if stones[0] <= stones[1] else 1
+        self.empty = self.cells.count(None)
+
+    def window_score(self, w):
+        x_count = self.counts[0][w]
+        o_count = self.counts[1][w]
+        if o_count == 0:
+            return self.game.weights[x_count]
+        if x_count == 0:
+            return -self.game.weights[o_count]
+        return 0
+
+    def place(self, cell, player):
+        """
+        Puts a stone on `cell`, returning True if it completes a line.
+        """
+        game = self.game
+        won = False
+        self.cells[cell] = player
+        self.hash ^= game.zobrist[player][cell]
+        counts = self.counts[player]
+        for w in game.cell_windows[cell]:
+            before = self.window_score(w)
+            counts[w] += 1
+            self.score += self.window_score(w) - before
+            if counts[w] == game.k:
+                won = True
+        self.won = self.won or won
+        return won
+
+    def play(self, cell):
+        self.history.append(self.won)
+        self.place(cell, self.turn)
+        self.turn ^= 1
+        self.empty -= 1
+
+    def undo(self, cell):
+        game = self.game
+        self.turn ^= 1
+        self.empty += 1
+        player = self.turn
+        self.cells[cell] = None
+        self.hash ^= game.zobrist[player][cell]
+        counts = self.counts[player]
+        for w in game.cell_windows[cell]:
+            before = self.window_score(w)
+            counts[w] -= 1
+            self.score += self.window_score(w) - before
+        self.won = self.history.pop()
+
+
+class Search():
+    """
+    One iterative-deepening search from a position, with a deadline.
+    """
+
+    def __init__(self, game, board, deadline, cancel=None):
+        self.game = game
+        self.position = Position(game, board)
+        self.deadline = deadline
+        self.cancel = cancel
+        self.nodes = 0
+
+    def candidates(self, first=None):
+        """
+        Returns the empty cells worth trying, best first: the cell `first`,
+        then cells near existing stones (every empty cell on small
+        boards), nearest the centre first.
+        """
+        game = self.game
+        cells = self.position.cells
+        if len(cells) <= 16:
+            moves = [cell for cell in game.central if cells[cell] is None]
+        else:
+            near = set()
+            for cell, stone in enumerate(cells):
+                if stone is not None:
+                    near.update(other for other in game.nearby[cell]
+                                if cells[other] is None)
+            moves = [cell for cell in game.central if cell in near]
+            if not moves:
+                moves = [cell for cell in game.central if cells[cell] is None]
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def root(self, depth):
+        """
+        Searches the root to `depth`, returning (value, best cell).
+        """
+        position = self.position
+        entry = self.game.transpositions.get(position.hash)
+        alpha = -WIN - 1
+        best = None
+        for cell in self.candidates(entry[3] if entry else None):
+            position.play(cell)
+            value = -self.negamax(depth - 1, -WIN - 1, -alpha, 1)
+            position.undo(cell)
+            if best is None or value > alpha:
+                alpha = value
+                best = cell
+        self.game.transpositions[position.hash] = (depth, alpha, EXACT, best)
+        return alpha, best
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        Returns the value of the position for the player to move.
+        """
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0:
+            if time.perf_counter() > self.deadline or (
+                self.cancel is not None and self.cancel.is_set()
+            ):
+                raise Timeout()
+
+        position = self.position
+        if position.won:
+            return -(WIN - ply)
+        if position.empty == 0:
+            return 0
+        if depth == 0:
+            return position.score if position.turn == 0 else -position.score
+
+        transpositions = self.game.transpositions
+        entry = transpositions.get(position.hash)
+        first = None
+        if entry is not None:
+            stored_depth, value, kind, first = entry
+            if stored_depth >= depth:
+                value = _from_table(value, ply)
+                if kind == EXACT:
+                    return value
+                if kind == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        original_alpha = alpha
+        best_value = -WIN - 1
+        best = None
+        for cell in self.candidates(first):
+            position.play(cell)
+            value = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            position.undo(cell)
+            if value > best_value:
+                best_value = value
+                best = cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            kind = UPPER
+        elif best_value >= beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        transpositions[position.hash] = (
+            depth, _to_table(best_value, ply), kind, best
+        )
+        return best_value
+
+
+def _to_table(value, ply):
+    """
+    Converts a win or loss score relative to the root into one relative
+    to the current position, so it can be reused at any ply.
+    """
+    if value >= WON:
+        return value + ply
+    if value <= -WON:
+        return value - ply
+    return value
+
+
+def _from_table(value, ply):
+    if value >= WON:
+        return value - ply
+    if value <= -WON:
+        return value + ply
+    return value
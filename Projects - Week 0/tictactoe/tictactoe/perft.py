@@ -0,0 +1,182 @@
+"""
+Move-generation counts and search benchmarks for Tic Tac Toe.
+
+Usage: python perft.py [depth] [--profile] [--json FILE]
+
+Perft counts the positions reached after each number of moves from the
+empty board, stopping at finished games, using both the list-of-lists
+functions of tictactoe.py and bitboard.py, and checks them against the
+known totals. The search benchmark then times alpha-beta search from a
+fixed set of positions with an empty transposition table.
+"""
+import cProfile
+import json
+import pstats
+import sys
+import time
+
+import bitboard
+import tictactoe as ttt
+
+USAGE = "Usage: python perft.py [depth] [--profile] [--json FILE]"
+
+# Positions after each number of moves, games ending when someone wins
+PERFT = [1, 9, 72, 504, 3024, 15120, 54720, 148176, 200448, 127872]
+
+# (name, board) pairs searched by the benchmark, rows separated by "/"
+POSITIONS = [
+    ("empty", ".../.../..."),
+    ("centre", ".../.X./..."),
+    ("corner", "X../.../..."),
+    ("edge", ".X./.../..."),
+    ("centre-corner", "O../.X./..."),
+    ("fork-threat", "X../.O./..X"),
+    ("block", "XX./.O./..."),
+    ("midgame", "X.O/.X./O.."),
+    ("endgame", "XOX/OX./.O.")
+]
+
+
+def parse(text):
+    """
+    Returns the list-of-lists board for a string such as "X.O/.X./O..".
+    """
+    cells = {"X": ttt.X, "O": ttt.O, ".": ttt.EMPTY}
+    return [[cells[cell] for cell in row] for row in text.split("/")]
+
+
+def perft(board, depth):
+    """
+    Returns the number of positions `depth` moves after `board`, using
+    actions and result from tictactoe.py.
+    """
+    if depth == 0:
+        return 1
+    if ttt.terminal(board):
+        return 0
+    return sum(perft(ttt.result(board, action), depth - 1)
+               for action in ttt.actions(board))
+
+
+def perft_bitboard(x, o, depth):
+    """
+    Returns the number of positions `depth` moves after (x, o), using
+    bitboard.py.
+    """
+    if depth == 0:
+        return 1
+    if bitboard.terminal(x, o):
+        return 0
+    return sum(perft_bitboard(*bitboard.result(x, o, bit), depth - 1)
+               for bit in bitboard.bits(bitboard.moves(x, o)))
+
+
+def run_perft(max_depth):
+    """
+    Counts positions to each depth up to `max_depth` with both move
+    generators. Raises AssertionError if a count is wrong.
+    """
+    results = []
+    board = ttt.initial_state()
+    for depth in range(max_depth + 1):
+        start = time.perf_counter()
+        count = perft(board, depth)
+        seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        bitboard_count = perft_bitboard(0, 0, depth)
+        bitboard_seconds = time.perf_counter() - start
+        if count != PERFT[depth] or bitboard_count != PERFT[depth]:
+            raise AssertionError(
+                f"perft({depth}) gave {count} and {bitboard_count}, "
+                f"expected {PERFT[depth]}"
+            )
+        results.append({
+            "depth": depth,
+            "positions": count,
+            "seconds": seconds,
+            "bitboard_seconds": bitboard_seconds
+        })
+    return results
+
+
+def bench_search():
+    """
+    Searches each benchmark position from an empty transposition table,
+    returning the move, search counters and timings per position.
+    """
+    results = {}
+    for name, text in POSITIONS:
+        board = parse(text)
+        x, o = bitboard.from_board(board)
+
+        ttt.transpositions.clear()
+        ttt.reset_counters()
+        start = time.perf_counter()
+        action = ttt.search_root(x, o)
+        seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ttt.minimax(board)
+        minimax_seconds = time.perf_counter() - start
+
+        results[name] = {
+            "board": text,
+            "action": list(action),
+            **ttt.counters,
+            "search_ms": seconds * 1000,
+            "minimax_ms": minimax_seconds * 1000,
+            "nodes_per_second": (ttt.counters["nodes"] / seconds
+                                 if seconds else None)
+        }
+    return results
+
+
+def main():
+    args = sys.argv[1:]
+    profile = "--profile" in args
+    if profile:
+        args.remove("--profile")
+    output = None
+    if "--json" in args:
+        i = args.index("--json")
+        if i + 1 >= len(args):
+            sys.exit(USAGE)
+        output = args[i + 1]
+        del args[i:i + 2]
+    if len(args) > 1 or (args and not args[0].isdigit()):
+        sys.exit(USAGE)
+    depth = min(int(args[0]) if args else len(PERFT) - 1, len(PERFT) - 1)
+
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+    results = {
+        "perft": run_perft(depth),
+        "search": bench_search()
+    }
+    if profiler:
+        profiler.disable()
+
+    print("Perft")
+    for entry in results["perft"]:
+        print(f"    depth {entry['depth']}  {entry['positions']:>7} positions"
+              f"  {entry['seconds']:8.4f}s  "
+              f"bitboard {entry['bitboard_seconds']:8.4f}s")
+    print("Search")
+    for name, entry in results["search"].items():
+        print(f"    {name:<14} move {tuple(entry['action'])}  "
+              f"nodes {entry['nodes']:>6}  hits {entry['hits']:>5}  "
+              f"cutoffs {entry['cutoffs']:>5}  "
+              f"search {entry['search_ms']:8.3f} ms  "
+              f"minimax {entry['minimax_ms']:6.3f} ms")
+
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,44 @@
 import pygame
 import sys
+import threading
 import time
 
+import mnk
 import tictactoe as ttt
 
+# Board size and line length, e.g. "python runner.py 5 5 4"
+if len(sys.argv) not in [1, 4]:
+    sys.exit("Usage: python runner.py [rows columns k]")
+rows, columns, k = 3, 3, 3
+if len(sys.argv) == 4:
+    rows, columns, k = (int(arg) for arg in sys.argv[1:])
+
+# Classic boards use the perfect player, others the time-limited m,n,k engine
+game = ttt if (rows, columns, k) == (3, 3, 3) else mnk.Game(rows, columns, k)
+
+
+def start_ai(board):
+    """
+    Starts computing the AI's move for a board on a background thread.
+    Returns the thread's result dictionary, which gets a "move" key once
+    the move is ready, and an event that cancels the computation.
+    """
+    result = {}
+    cancel = threading.Event()
+
+    def think():
+        if isinstance(game, mnk.Game):
+            result["move"] = game.best_move(board, cancel=cancel)
+        else:
+            result["move"] = game.minimax(board)
+
+    threading.Thread(target=think, daemon=True).start()
+    return result, cancel
+
+
 pygame.init()
 size = width, height = 600, 400
+clock = pygame.time.Clock()
 
 # Colors
 black = (0, 0, 0)
@@ -15,16 +48,26 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Fit the board below the title and above the "Play Again" button
+tile_size = int(min(80, (height - 140) / rows, (width - 40) / columns))
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
 
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = game.initial_state()
+
+# (result, cancel) for the AI move being computed, if any
+ai = None
 
 while True:
 
+    # Limit the frame rate so drawing leaves time for the AI thread
+    clock.tick(30)
+
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            if ai is not None:
+                ai[1].set()
             sys.exit()
 
     screen.fill(black)
@@ -67,13 +110,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (columns / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(columns):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -89,12 +131,12 @@ while True:
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = game.terminal(board)
+        player = game.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = game.winner(board)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -102,34 +144,35 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (int(time.time() * 3) % 4)
+            title = f"Computer thinking{dots:<3}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Start the AI's move, or play it once it is ready
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai is None:
+                ai = start_ai(board)
+            elif "move" in ai[0]:
+                board = game.result(board, ai[0]["move"])
+                ai = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(columns):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
+                        board = game.result(board, (i, j))
 
-        if game_over:
+        # Offer a new game, which also cancels any move being computed
+        if game_over or ai is not None:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
+            label = "Play Again" if game_over else "Reset"
+            again = mediumFont.render(label, True, black)
             againRect = again.get_rect()
             againRect.center = againButton.center
             pygame.draw.rect(screen, white, againButton)
@@ -139,8 +182,10 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    if ai is not None:
+                        ai[1].set()
+                        ai = None
                     user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    board = game.initial_state()
 
     pygame.display.flip()
@@ -0,0 +1,124 @@
+"""
+Builds and verifies the precomputed Tic Tac Toe solution table.
+
+Usage: python solve.py            writes the table
+       python solve.py --verify   checks the table against brute force
+"""
+import functools
+import math
+import struct
+import sys
+
+import bitboard
+import tictactoe as ttt
+
+
+def reachable():
+    """
+    Returns the set of (x, o) positions reachable from the empty board.
+    """
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen:
+            continue
+        seen.add((x, o))
+        if bitboard.terminal(x, o):
+            continue
+        for bit in bitboard.bits(bitboard.moves(x, o)):
+            stack.append(bitboard.result(x, o, bit))
+    return seen
+
+
+def solve():
+    """
+    Returns a dictionary mapping the canonical key of every reachable
+    position to its (best cell, value), with the cell in canonical
+    orientation and NO_MOVE for finished games.
+    """
+    table = {}
+    for x, o in reachable():
+        key, symmetry = bitboard.canonical(x, o)
+        if key in table:
+            continue
+        transform = bitboard.TRANSFORMS[symmetry]
+        x, o = transform[x], transform[o]
+
+        value = ttt.search(x, o, -math.inf, math.inf)
+        move = ttt.NO_MOVE
+        if not bitboard.terminal(x, o):
+            for bit in ttt.ordered_moves(x, o):
+                child = bitboard.result(x, o, bit)
+                if ttt.search(*child, -math.inf, math.inf) == value:
+                    move = bit.bit_length() - 1
+                    break
+        table[key] = (move, value)
+    return table
+
+
+def write(table, path=ttt.SOLUTIONS):
+    """
+    Writes the table as a count followed by sorted (key, cell, value)
+    records.
+    """
+    with open(path, "wb") as f:
+        f.write(ttt.SOLUTIONS_MAGIC)
+        f.write(struct.pack("<I", len(table)))
+        for key in sorted(table):
+            move, value = table[key]
+            f.write(ttt.SOLUTION_RECORD.pack(key, move, value))
+
+
+@functools.lru_cache(maxsize=None)
+def brute_force(cells):
+    """
+    Returns the value of a board, given as a tuple of its rows, by
+    plain minimax over list boards.
+    """
+    board = [list(row) for row in cells]
+    if ttt.terminal(board):
+        empty = sum(row.count(ttt.EMPTY) for row in board)
+        return ttt.utility(board) * (1 + empty)
+    values = [brute_force(tuple(map(tuple, ttt.result(board, action))))
+              for action in ttt.actions(board)]
+    return max(values) if ttt.player(board) == ttt.X else min(values)
+
+
+def verify():
+    """
+    Checks the stored move and value of every reachable position.
+    Returns the number of positions checked.
+    """
+    ttt.solutions = None
+    checked = 0
+    for x, o in reachable():
+        board = bitboard.to_board(x, o)
+        cells = tuple(map(tuple, board))
+        value = brute_force(cells)
+        key, _ = bitboard.canonical(x, o)
+        if ttt.load_solutions()[key][1] != value:
+            raise AssertionError(f"wrong value for {board}")
+        if not ttt.terminal(board):
+            action = ttt.lookup(x, o)
+            child = ttt.result(board, action)
+            if brute_force(tuple(map(tuple, child))) != value:
+                raise AssertionError(f"wrong move {action} for {board}")
+        checked += 1
+    return checked
+
+
+def main():
+    if sys.argv[1:] == ["--verify"]:
+        checked = verify()
+        print(f"Verified {checked} positions.")
+    elif not sys.argv[1:]:
+        table = solve()
+        write(table)
+        print(f"Wrote {len(table)} positions to {ttt.SOLUTIONS}.")
+    else:
+        sys.exit("Usage: python solve.py [--verify]")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@ Tic Tac Toe Player
 """
 import copy
 import math
+import os
+import struct
+
+import bitboard
 
 X = "X"
 O = "O"
@@ -159,129 +163,181 @@ def utility(board):
     else:
         return 0
 
-#Version 3 - "Last stand" update
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
     if terminal(board):
         return None
-    last_action = ()
-    if player(board) == X:
-        player_action_set = actions(board)
-        best_value = -1000
-        for action_player in player_action_set:
-            player_board = result(board, action_player)
-            if utility(player_board) == 1:
-                return action_player
-            enemy_action_set = actions(player_board)
-            worst_value = 0
-            
-            for action_enemy in enemy_action_set:
-                enemy_board = result(player_board, action_enemy)
-                current_value = utility(enemy_board)
-                worst_value = worst_value + current_value
-            if best_value < worst_value:
-                last_action = action_player
-                if worst_value == 0:
-                    return action_player
-                else:
-                    best_value = worst_value
-        return last_action
-    
-    #Player X works fine
-    
+
+    x, o = bitboard.from_board(board)
+    action = lookup(x, o)
+    if action is not None:
+        return action
+    return search_root(x, o)
+
+
+def search_root(x, o):
+    """
+    Returns the best action for a nonterminal bitboard position by
+    alpha-beta search, without consulting the solution table.
+    """
+    maximizing = bitboard.player(x, o) == X
+    alpha = -math.inf
+    beta = math.inf
+    best_value = None
+    best_action = None
+    for bit in ordered_moves(x, o):
+        child_x, child_o = bitboard.result(x, o, bit)
+        value = search(child_x, child_o, alpha, beta)
+        if best_value is None or (value > best_value if maximizing
+                                  else value < best_value):
+            best_value = value
+            best_action = bitboard.ACTIONS[bit]
+        if maximizing:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+    return best_action
+
+
+# Precomputed best moves, written by solve.py
+SOLUTIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "solutions.bin")
+SOLUTIONS_MAGIC = b"TTTSOLV1"
+
+# Canonical key, best cell in canonical orientation, value
+SOLUTION_RECORD = struct.Struct("<IBb")
+
+# Cell stored for positions where the game is over
+NO_MOVE = 255
+
+# Maps canonical keys to (cell, value) pairs, loaded on first use
+solutions = None
+
+
+def load_solutions():
+    """
+    Returns the precomputed solution table, or an empty table if it
+    has not been built.
+    """
+    global solutions
+
+    if solutions is None:
+        solutions = {}
+        try:
+            with open(SOLUTIONS, "rb") as f:
+                data = f.read()
+        except OSError:
+            return solutions
+        if data[:len(SOLUTIONS_MAGIC)] != SOLUTIONS_MAGIC:
+            return solutions
+        (count,) = struct.unpack_from("<I", data, len(SOLUTIONS_MAGIC))
+        offset = len(SOLUTIONS_MAGIC) + 4
+        for key, cell, value in SOLUTION_RECORD.iter_unpack(
+            data[offset:offset + count * SOLUTION_RECORD.size]
+        ):
+            solutions[key] = (cell, value)
+    return solutions
+
+
+def lookup(x, o):
+    """
+    Returns the precomputed best action for a bitboard position, or None
+    if the game is over or the position is not in the table.
+    """
+    key, symmetry = bitboard.canonical(x, o)
+    entry = load_solutions().get(key)
+    if entry is None or entry[0] == NO_MOVE:
+        return None
+    cell = bitboard.SYMMETRIES[symmetry][entry[0]]
+    return divmod(cell, 3)
+
+
+# Cells in the order moves are tried: centre, corners, then edges
+MOVE_ORDER = [1 << cell for cell in [4, 0, 2, 6, 8, 1, 3, 5, 7]]
+
+# Kinds of values stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Maps canonical positions to (value, kind) pairs. Values do not depend
+# on how a position was reached, so entries are kept between moves.
+transpositions = {}
+
+# Search counters, for benchmarking: positions searched, transposition
+# table hits that decided a position, and alpha-beta cutoffs
+counters = {"nodes": 0, "hits": 0, "cutoffs": 0}
+
+
+def reset_counters():
+    """
+    Sets every search counter back to zero.
+    """
+    for name in counters:
+        counters[name] = 0
+
+
+def ordered_moves(x, o):
+    """
+    Yields the empty cells of a bitboard position as single-cell masks,
+    most promising first.
+    """
+    empty = bitboard.moves(x, o)
+    for bit in MOVE_ORDER:
+        if empty & bit:
+            yield bit
+
+
+def search(x, o, alpha, beta):
+    """
+    Returns the minimax value of a bitboard position using alpha-beta
+    pruning. Wins are worth more the fewer moves they take.
+    """
+    counters["nodes"] += 1
+    empty = 9 - bitboard.POPCOUNT[x | o]
+    if bitboard.WINNING[x]:
+        return 1 + empty
+    if bitboard.WINNING[o]:
+        return -1 - empty
+    if not empty:
+        return 0
+
+    key, _ = bitboard.canonical(x, o)
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, kind = entry
+        if kind == EXACT:
+            counters["hits"] += 1
+            return value
+        if kind == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            counters["hits"] += 1
+            return value
+
+    original_alpha = alpha
+    original_beta = beta
+    maximizing = bitboard.POPCOUNT[x] <= bitboard.POPCOUNT[o]
+    best = -math.inf if maximizing else math.inf
+    for bit in ordered_moves(x, o):
+        if maximizing:
+            best = max(best, search(x | bit, o, alpha, beta))
+            alpha = max(alpha, best)
+        else:
+            best = min(best, search(x, o | bit, alpha, beta))
+            beta = min(beta, best)
+        if alpha >= beta:
+            counters["cutoffs"] += 1
+            break
+
+    if best <= original_alpha:
+        transpositions[key] = (best, UPPER)
+    elif best >= original_beta:
+        transpositions[key] = (best, LOWER)
     else:
-        player_action_set = actions(board)
-        best_value = 1000
-        for action_player in player_action_set:
-            player_board = result(board, action_player)
-            if utility(player_board) == -1:
-                return action_player
-            enemy_action_set = actions(player_board)
-            worst_value = 0
-            
-            for action_enemy in enemy_action_set:
-                enemy_board = result(player_board, action_enemy)
-                current_value = utility(enemy_board)
-                worst_value = worst_value + current_value
-            if best_value > worst_value:
-                last_action = action_player
-                if worst_value == 0:
-                    return action_player
-                else:
-                    best_value = worst_value
-        return last_action
-#Player 2 works fine now :D
-            
-                
-#Version 2 - Working                
-    # if player(board) == X:
-    #     player_action_set = actions(board)
-    #     for action_player in player_action_set:
-    #         player_board = result(board, action_player)
-    #         enemy_action_set = actions(player_board)
-    #         worst_value = 1000
-    #         best_value = -1000
-    #         for action_enemy in enemy_action_set:
-    #             enemy_board = result(player_board, action_enemy)
-    #             current_value = utility(enemy_board)
-    #             if worst_value > current_value:
-    #                 worst_value = current_value
-    #         if best_value < worst_value:
-    #             last_action = action_player
-    #             if worst_value == 0:
-    #                 return action_player
-    #             else:
-    #                 best_value = worst_value
-    #     return last_action            
-                
-                
-                
-                
-
-
-
-
-#Version 1 - Does not work
-    # if terminal(board):
-    #     return None
-    # posibilities = []
-    
-    # vmax = 10
-    # vmin = -10
-    
-    # actions_max = actions(board)
-    # actions_min = actions(board)
-    
-    
-    # if player(board) == X:
-    #     for action_max in actions_max:
-    #         max_new_board = result(board, action_max)
-    #         if utility(max_new_board) == 1:
-    #             return action_max
-    #         actions_min = actions(max_new_board)
-    #         for action_min in actions_min:
-    #             min_new_board = result(max_new_board, action_min)
-    #             if vmax > utility(min_new_board):
-    #                 vmax = utility(min_new_board)
-    #         if vmin < vmax:
-    #             posibilities.append(action_max)
-    #             vmin = vmax
-    #     return posibilities.pop()
-
-    # else:
-    #     for action_max in actions_max:
-    #         max_new_board = result(board, action_max)
-    #         if utility(max_new_board) == 1:
-    #             return action_max
-    #         actions_min = actions(max_new_board)
-    #         for action_min in actions_min:
-    #             min_new_board = result(max_new_board, action_min)
-    #             if vmin > utility(min_new_board):
-    #                 vmin = utility(min_new_board)
-    #         if vmax < vmin:
-    #             posibilities.append(action_max)
-    #             vmax = vmin
-    #         vmax = 10
-    #     return posibilities.pop()
+        transpositions[key] = (best, EXACT)
+    return best
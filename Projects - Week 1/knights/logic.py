@@ -1,8 +1,46 @@
+import functools
 import itertools
+import multiprocessing
+import operator
+import os
+import weakref
+
+import sat
+
+
+def _memoised(method):
+    """Caches the result of a method on interned sentences."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self):
+        if not self.frozen:
+            return method(self)
+        if name not in self.cache:
+            self.cache[name] = method(self)
+        result = self.cache[name]
+        return set(result) if isinstance(result, set) else result
+    return wrapper
+
+
+def _interned_eq(method):
+    """Compares interned sentences by identity."""
+
+    @functools.wraps(method)
+    def wrapper(self, other):
+        if self is other:
+            return True
+        if self.frozen and getattr(other, "frozen", False):
+            return False
+        return method(self, other)
+    return wrapper
 
 
 class Sentence():
 
+    # Interned sentences are shared and must not be changed
+    frozen = False
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -47,9 +85,11 @@ class Symbol(Sentence):
     def __init__(self, name):
         self.name = name
 
+    @_interned_eq
     def __eq__(self, other):
         return isinstance(other, Symbol) and self.name == other.name
 
+    @_memoised
     def __hash__(self):
         return hash(("symbol", self.name))
 
@@ -62,21 +102,53 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    @_memoised
     def formula(self):
         return self.name
 
+    @_memoised
     def symbols(self):
         return {self.name}
 
 
+class Constant(Sentence):
+
+    def __init__(self, value):
+        self.value = bool(value)
+
+    def __eq__(self, other):
+        return isinstance(other, Constant) and self.value == other.value
+
+    def __hash__(self):
+        return hash(("constant", self.value))
+
+    def __repr__(self):
+        return "TRUE" if self.value else "FALSE"
+
+    def evaluate(self, model):
+        return self.value
+
+    def formula(self):
+        return "⊤" if self.value else "⊥"
+
+    def symbols(self):
+        return set()
+
+
+TRUE = Constant(True)
+FALSE = Constant(False)
+
+
 class Not(Sentence):
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
 
+    @_interned_eq
     def __eq__(self, other):
         return isinstance(other, Not) and self.operand == other.operand
 
+    @_memoised
     def __hash__(self):
         return hash(("not", hash(self.operand)))
 
@@ -86,9 +158,11 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    @_memoised
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
+    @_memoised
     def symbols(self):
         return self.operand.symbols()
 
@@ -99,9 +173,11 @@ class And(Sentence):
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
 
+    @_interned_eq
     def __eq__(self, other):
         return isinstance(other, And) and self.conjuncts == other.conjuncts
 
+    @_memoised
     def __hash__(self):
         return hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
@@ -114,18 +190,22 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        if self.frozen:
+            raise Exception("cannot add to an interned sentence")
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    @_memoised
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
+    @_memoised
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
@@ -136,9 +216,11 @@ class Or(Sentence):
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
 
+    @_interned_eq
     def __eq__(self, other):
         return isinstance(other, Or) and self.disjuncts == other.disjuncts
 
+    @_memoised
     def __hash__(self):
         return hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
@@ -151,12 +233,14 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    @_memoised
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
+    @_memoised
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
@@ -168,11 +252,13 @@ class Implication(Sentence):
         self.antecedent = antecedent
         self.consequent = consequent
 
+    @_interned_eq
     def __eq__(self, other):
         return (isinstance(other, Implication)
                 and self.antecedent == other.antecedent
                 and self.consequent == other.consequent)
 
+    @_memoised
     def __hash__(self):
         return hash(("implies", hash(self.antecedent), hash(self.consequent)))
 
@@ -183,11 +269,13 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    @_memoised
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
+    @_memoised
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
@@ -199,11 +287,13 @@ class Biconditional(Sentence):
         self.left = left
         self.right = right
 
+    @_interned_eq
     def __eq__(self, other):
         return (isinstance(other, Biconditional)
                 and self.left == other.left
                 and self.right == other.right)
 
+    @_memoised
     def __hash__(self):
         return hash(("biconditional", hash(self.left), hash(self.right)))
 
@@ -211,53 +301,756 @@ class Biconditional(Sentence):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
 
+    @_memoised
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
+    @_memoised
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
+# Maps the structure of each interned sentence to the sentence
+_interned = weakref.WeakValueDictionary()
+
+
+def intern(sentence):
+    """
+    Returns the shared, immutable copy of sentence. Structurally equal
+    sentences intern to the same object, so a knowledge base becomes a
+    DAG whose nodes cache their hash, symbols and formula.
+    """
+    if sentence.frozen:
+        return sentence
+    if isinstance(sentence, Symbol):
+        key = (Symbol, sentence.name)
+    elif isinstance(sentence, Constant):
+        key = (Constant, sentence.value)
+    elif isinstance(sentence, Not):
+        key = (Not, intern(sentence.operand))
+    elif isinstance(sentence, And):
+        key = (And, *[intern(conjunct) for conjunct in sentence.conjuncts])
+    elif isinstance(sentence, Or):
+        key = (Or, *[intern(disjunct) for disjunct in sentence.disjuncts])
+    elif isinstance(sentence, Implication):
+        key = (Implication, intern(sentence.antecedent),
+               intern(sentence.consequent))
+    elif isinstance(sentence, Biconditional):
+        key = (Biconditional, intern(sentence.left), intern(sentence.right))
+    else:
+        raise Exception(f"cannot intern {sentence}")
+
+    node = _interned.get(key)
+    if node is None:
+        kind, *operands = key
+        node = kind(*operands)
+        node.frozen = True
+        node.cache = {}
+        _interned[key] = node
+    return node
+
+
+# Compiled functions of interned sentences, by tuple of symbol names
+_compiled = weakref.WeakKeyDictionary()
+
+
+def operands(sentence):
+    """Returns the immediate subterms of sentence."""
+    if isinstance(sentence, Not):
+        return [sentence.operand]
+    if isinstance(sentence, And):
+        return sentence.conjuncts
+    if isinstance(sentence, Or):
+        return sentence.disjuncts
+    if isinstance(sentence, Implication):
+        return [sentence.antecedent, sentence.consequent]
+    if isinstance(sentence, Biconditional):
+        return [sentence.left, sentence.right]
+    return []
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Returns a function that evaluates sentence given a sequence of
+    boolean values, one for each name in the list symbols. Subterms with
+    more than one parent are evaluated at most once per call. Interned
+    sentences keep their functions, so each is compiled only once for a
+    given list of symbols.
+    """
+    key = tuple(symbols)
+    if sentence.frozen and key in _compiled.get(sentence, {}):
+        return _compiled[sentence][key]
+
+    parents = {}
+    pending = [sentence]
+    while pending:
+        node = pending.pop()
+        parents[node] = parents.get(node, 0) + 1
+        if parents[node] == 1:
+            pending.extend(operands(node))
+
+    positions = {name: i for i, name in enumerate(symbols)}
+    calls = [0]
+    functions = {}
+
+    def build(node):
+        if node in functions:
+            return functions[node]
+        if isinstance(node, Symbol):
+            function = operator.itemgetter(positions[node.name])
+        elif isinstance(node, Constant):
+            function = _constant(node.value)
+        elif isinstance(node, Not):
+            function = _not(build(node.operand))
+        elif isinstance(node, And):
+            function = _all([build(child) for child in node.conjuncts])
+        elif isinstance(node, Or):
+            function = _any([build(child) for child in node.disjuncts])
+        elif isinstance(node, Implication):
+            function = _any([_not(build(node.antecedent)),
+                             build(node.consequent)])
+        elif isinstance(node, Biconditional):
+            function = _iff(build(node.left), build(node.right))
+        else:
+            raise Exception(f"cannot compile {node}")
+        if parents[node] > 1 and not isinstance(node, (Symbol, Constant)):
+            function = _once_per_call(function, calls)
+        functions[node] = function
+        return function
+
+    root = build(sentence)
+    if any(count > 1 and not isinstance(node, (Symbol, Constant))
+           for node, count in parents.items()):
+        def compiled(values):
+            calls[0] += 1
+            return root(values)
+    else:
+        compiled = root
+
+    if sentence.frozen:
+        _compiled.setdefault(sentence, {})[key] = compiled
+    return compiled
+
+
+def _constant(value):
+    """Returns a function that is always value."""
+    def constant(values):
+        return value
+    return constant
+
+
+def _not(function):
+    """Returns a function true when function is false."""
+    def negation(values):
+        return not function(values)
+    return negation
+
+
+def _iff(left, right):
+    """Returns a function true when left and right agree."""
+    def biconditional(values):
+        return left(values) == right(values)
+    return biconditional
+
+
+def _all(functions):
+    """Returns a function true when all of functions are."""
+    def conjunction(values):
+        for function in functions:
+            if not function(values):
+                return False
+        return True
+    return conjunction
+
+
+def _any(functions):
+    """Returns a function true when any of functions is."""
+    def disjunction(values):
+        for function in functions:
+            if function(values):
+                return True
+        return False
+    return disjunction
+
+
+def _once_per_call(function, calls):
+    """
+    Returns function memoised until calls[0], the number of calls of the
+    compiled sentence, changes.
+    """
+    last = [None, None]
+
+    def once(values):
+        if last[0] != calls[0]:
+            last[1] = function(values)
+            last[0] = calls[0]
+        return last[1]
+    return once
+
+
+def negate(sentence):
+    """Returns the negation of sentence, removing a double negation."""
+    if isinstance(sentence, Not):
+        return sentence.operand
+    if isinstance(sentence, Constant):
+        return FALSE if sentence.value else TRUE
+    return Not(sentence)
+
+
+def simplify(sentence):
+    """
+    Returns an equivalent sentence with implications eliminated, constants
+    folded, double negations removed, nested conjunctions and disjunctions
+    flattened and duplicate or complementary operands resolved.
+    """
+    if isinstance(sentence, (Symbol, Constant)):
+        return sentence
+    if isinstance(sentence, Not):
+        return negate(simplify(sentence.operand))
+    if isinstance(sentence, Implication):
+        return simplify(Or(Not(sentence.antecedent), sentence.consequent))
+    if isinstance(sentence, Biconditional):
+        left = simplify(sentence.left)
+        right = simplify(sentence.right)
+        if isinstance(left, Constant):
+            left, right = right, left
+        if isinstance(right, Constant):
+            return left if right.value else negate(left)
+        if left == right:
+            return TRUE
+        if left == negate(right):
+            return FALSE
+        return Biconditional(left, right)
+    if isinstance(sentence, (And, Or)):
+        conjunction = isinstance(sentence, And)
+        kind = And if conjunction else Or
+        operands = {}
+        pending = list(reversed(
+            sentence.conjuncts if conjunction else sentence.disjuncts
+        ))
+        while pending:
+            operand = simplify(pending.pop())
+            if isinstance(operand, kind):
+                pending.extend(reversed(
+                    operand.conjuncts if conjunction else operand.disjuncts
+                ))
+            elif isinstance(operand, Constant):
+                # FALSE decides a conjunction and TRUE a disjunction
+                if operand.value != conjunction:
+                    return operand
+            elif negate(operand) in operands:
+                return FALSE if conjunction else TRUE
+            else:
+                operands[operand] = None
+        if not operands:
+            return TRUE if conjunction else FALSE
+        if len(operands) == 1:
+            return next(iter(operands))
+        return kind(*operands)
+    raise Exception(f"cannot simplify {sentence}")
+
+
+def substitute(sentence, assignment):
+    """Returns sentence with symbols in assignment replaced by constants."""
+    if isinstance(sentence, Symbol):
+        if sentence.name in assignment:
+            return TRUE if assignment[sentence.name] else FALSE
+        return sentence
+    if isinstance(sentence, Constant):
+        return sentence
+    if isinstance(sentence, Not):
+        return Not(substitute(sentence.operand, assignment))
+    if isinstance(sentence, And):
+        return And(*[substitute(conjunct, assignment)
+                     for conjunct in sentence.conjuncts])
+    if isinstance(sentence, Or):
+        return Or(*[substitute(disjunct, assignment)
+                    for disjunct in sentence.disjuncts])
+    if isinstance(sentence, Implication):
+        return Implication(substitute(sentence.antecedent, assignment),
+                           substitute(sentence.consequent, assignment))
+    if isinstance(sentence, Biconditional):
+        return Biconditional(substitute(sentence.left, assignment),
+                             substitute(sentence.right, assignment))
+    raise Exception(f"cannot substitute into {sentence}")
+
+
+def reduce(knowledge):
+    """
+    Simplifies a knowledge base, repeatedly assigning symbols asserted
+    (or denied) at the top level and simplifying again. Returns the
+    remaining knowledge and a dictionary of the assigned symbols.
+    """
+    assignment = {}
+    knowledge = simplify(knowledge)
+    while True:
+        conjuncts = (knowledge.conjuncts if isinstance(knowledge, And)
+                     else [knowledge])
+        units = {}
+        for conjunct in conjuncts:
+            if isinstance(conjunct, Symbol):
+                units[conjunct.name] = True
+            elif (isinstance(conjunct, Not)
+                  and isinstance(conjunct.operand, Symbol)):
+                units[conjunct.operand.name] = False
+        if not units:
+            return knowledge, assignment
+        assignment.update(units)
+        knowledge = simplify(substitute(knowledge, units))
+
+
+def check_all(knowledge, query, symbols, model):
+    """Checks if knowledge base entails query, given a particular model."""
+
+    # If model has an assignment for each symbol
+    if not symbols:
+
+        # If knowledge base is true in model, then query must also be true
+        if knowledge.evaluate(model):
+            return query.evaluate(model)
+        return True
+    else:
+
+        # Choose one of the remaining unused symbols
+        remaining = symbols.copy()
+        p = remaining.pop()
+
+        # Create a model where the symbol is true
+        model_true = model.copy()
+        model_true[p] = True
+
+        # Create a model where the symbol is false
+        model_false = model.copy()
+        model_false[p] = False
+
+        # Ensure entailment holds in both models
+        return (check_all(knowledge, query, remaining, model_true) and
+                check_all(knowledge, query, remaining, model_false))
+
+
+@functools.lru_cache(maxsize=32)
+def _reduced(knowledge):
+    """
+    Returns reduce(knowledge) for an interned knowledge base, with the
+    remaining knowledge interned. Cached, so that a knowledge base asked
+    several queries is reduced (and compiled) only once; the cache also
+    keeps recent knowledge bases interned.
+    """
+    knowledge, assignment = reduce(knowledge)
+    return intern(knowledge), assignment
+
+
+def prepare(knowledge, query):
+    """
+    Reduces a knowledge base and substitutes the symbols it fixes into
+    query. Returns the interned reduced knowledge and query, or None if
+    the knowledge base is unsatisfiable (and so entails anything).
+    """
+    knowledge, assignment = _reduced(intern(knowledge))
+    if knowledge == FALSE:
+        return None
+    return knowledge, intern(simplify(substitute(query, assignment)))
+
+
+def ordered_symbols(knowledge, *queries):
+    """
+    Returns the symbol names of knowledge, sorted, followed by those only
+    in queries, so that knowledge compiled over the first names can be
+    reused with any queries.
+    """
+    names = sorted(knowledge.symbols())
+    extra = set.union(set(), *[query.symbols() for query in queries])
+    return names + sorted(extra - set(names))
+
+
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
+    # Assign symbols the knowledge base fixes, and simplify what is left
+    prepared = prepare(knowledge, query)
+    if prepared is None:
+        return True
+    knowledge, query = prepared
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+    # Get all symbols in both knowledge and query
+    symbols = ordered_symbols(knowledge, query)
+    knowledge = compile_sentence(
+        knowledge, symbols[:len(knowledge.symbols())]
+    )
+    query = compile_sentence(query, symbols)
+
+    # Check that knowledge entails query in every model
+    for values in itertools.product([True, False], repeat=len(symbols)):
+        if knowledge(values) and not query(values):
+            return False
+    return True
+
+
+def model_check_many(knowledge, queries, refuted=False):
+    """
+    Returns the set of queries that knowledge base entails, enumerating
+    the models once for all of them. A query is dropped as soon as a
+    model of the knowledge base falsifies it. If refuted is true, also
+    returns the set of queries whose negation is entailed.
+    """
+    queries = list(queries)
+    knowledge, assignment = _reduced(intern(knowledge))
+    if knowledge == FALSE:
+        return (set(queries), set(queries)) if refuted else set(queries)
+    reduced = {query: intern(simplify(substitute(query, assignment)))
+               for query in queries}
+    symbols = ordered_symbols(knowledge, *reduced.values())
+    kb = compile_sentence(knowledge, symbols[:len(knowledge.symbols())])
+    compiled = {query: compile_sentence(reduced[query], symbols)
+                for query in queries}
+
+    # Queries not yet falsified, and (if wanted) not yet satisfied
+    entailed = set(queries)
+    negated = set(queries) if refuted else set()
+    for values in itertools.product([True, False], repeat=len(symbols)):
+        if not entailed and not negated:
+            break
+        if not kb(values):
+            continue
+        for query in entailed | negated:
+            if compiled[query](values):
+                negated.discard(query)
+            else:
+                entailed.discard(query)
+    return (entailed, negated) if refuted else entailed
+
+
+# Fewest symbols for which model_check_parallel uses a process pool
+PARALLEL_MIN_SYMBOLS = 16
+
+# Symbols enumerated by a worker between checks for cancellation
+PARALLEL_CHUNK_SYMBOLS = 10
+
+# State of each model_check_parallel worker process
+_worker = {}
+
+
+def _init_worker(stop, knowledge, query):
+    _worker["stop"] = stop
+    _worker["knowledge"] = intern(knowledge)
+    _worker["query"] = intern(query)
+
+
+def _check_partition(task):
+    """
+    Checks entailment in the models extending the assignment `fixed`.
+    Returns None if another worker has already found a counter-model.
+    """
+    fixed, rest = task
+    symbols = list(fixed) + rest
+    knowledge = compile_sentence(_worker["knowledge"], symbols)
+    query = compile_sentence(_worker["query"], symbols)
+    stop = _worker["stop"]
+    split = max(0, len(rest) - PARALLEL_CHUNK_SYMBOLS)
+    prefix = tuple(fixed.values())
+    for outer in itertools.product([True, False], repeat=split):
+        if stop.is_set():
+            return None
+        for inner in itertools.product([True, False],
+                                       repeat=len(rest) - split):
+            values = prefix + outer + inner
+            if knowledge(values) and not query(values):
+                stop.set()
+                return False
+    return True
+
+
+def model_check_parallel(knowledge, query, processes=None, split=None):
+    """
+    Checks if knowledge base entails query, fixing the first `split`
+    symbols to divide the models into 2 ** split parts that are checked
+    in a pool of processes. Stops every process once any finds a model
+    of the knowledge base in which query is false.
+    """
+    prepared = prepare(knowledge, query)
+    if prepared is None:
+        return True
+    knowledge, query = prepared
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    processes = processes or os.cpu_count()
+    if split is None:
+        if len(symbols) < PARALLEL_MIN_SYMBOLS:
+            return model_check(knowledge, query)
+
+        # Several parts per process, so that uneven parts balance out
+        split = (4 * processes - 1).bit_length()
+    split = min(split, len(symbols))
+
+    fixed, rest = symbols[:split], symbols[split:]
+    tasks = [(dict(zip(fixed, values)), rest)
+             for values in itertools.product([True, False], repeat=split)]
+    stop = multiprocessing.Event()
+    with multiprocessing.Pool(processes, _init_worker,
+                              (stop, knowledge, query)) as pool:
+        for result in pool.imap_unordered(_check_partition, tasks):
+            if result is False:
+                return False
+    return True
+
+
+def symbol_masks(count):
+    """
+    Returns one bitset per symbol over all 2 ** count models, where bit m
+    is set if the symbol is true in model m (symbol i is bit i of m).
+    """
+    size = 1 << count
+    masks = []
+    for i in range(count):
+        block = 1 << i
+        mask = ((1 << block) - 1) << block
+        length = 2 * block
+        while length < size:
+            mask |= mask << length
+            length *= 2
+        masks.append(mask)
+    return masks
+
+
+def lower(sentences, symbols):
+    """
+    Lowers sentences to a flat list of instructions over the given list
+    of symbol names, sharing equal subterms. Returns the instructions and
+    the index of the instruction computing each sentence.
+    """
+    instructions = []
+    indices = {}
+    positions = {name: i for i, name in enumerate(symbols)}
+
+    def emit(sentence):
+        if sentence in indices:
+            return indices[sentence]
+        if isinstance(sentence, Symbol):
+            instruction = ("symbol", positions[sentence.name])
+        elif isinstance(sentence, Constant):
+            instruction = ("constant", sentence.value)
+        elif isinstance(sentence, Not):
+            instruction = ("not", emit(sentence.operand))
+        elif isinstance(sentence, And):
+            instruction = ("and", *[emit(conjunct)
+                                    for conjunct in sentence.conjuncts])
+        elif isinstance(sentence, Or):
+            instruction = ("or", *[emit(disjunct)
+                                   for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            instruction = ("implies", emit(sentence.antecedent),
+                           emit(sentence.consequent))
+        elif isinstance(sentence, Biconditional):
+            instruction = ("iff", emit(sentence.left), emit(sentence.right))
         else:
+            raise Exception(f"cannot compile {sentence}")
+        instructions.append(instruction)
+        indices[sentence] = len(instructions) - 1
+        return indices[sentence]
+
+    results = [emit(sentence) for sentence in sentences]
+    return instructions, results
+
+
+def execute(instructions, count):
+    """
+    Evaluates instructions in all 2 ** count models at once, returning
+    a bitset of the models in which each instruction is true.
+    """
+    full = (1 << (1 << count)) - 1
+    masks = symbol_masks(count)
+    values = []
+    for op, *args in instructions:
+        if op == "symbol":
+            value = masks[args[0]]
+        elif op == "constant":
+            value = full if args[0] else 0
+        elif op == "not":
+            value = full ^ values[args[0]]
+        elif op == "and":
+            value = full
+            for arg in args:
+                value &= values[arg]
+        elif op == "or":
+            value = 0
+            for arg in args:
+                value |= values[arg]
+        elif op == "implies":
+            value = (full ^ values[args[0]]) | values[args[1]]
+        else:
+            value = full ^ (values[args[0]] ^ values[args[1]])
+        values.append(value)
+    return values
+
+
+def model_check_compiled(knowledge, query):
+    """
+    Checks if knowledge base entails query, evaluating every model at once
+    as bitsets.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    instructions, (kb, q) = lower([knowledge, query], symbols)
+    values = execute(instructions, len(symbols))
+    return values[kb] & ~values[q] == 0
+
+
+def extend(models, count, extra):
+    """
+    Returns a bitset of models over count symbols extended with extra
+    new symbols, each of which may take either value.
+    """
+    for i in range(count, count + extra):
+        models |= models << (1 << i)
+    return models
+
+
+class KnowledgeBase(And):
+    """
+    Conjunction that keeps the bitset of models satisfying it, so that
+    many queries can be answered without enumerating models again.
+    Conjuncts must be added with add() for the cache to stay correct.
+    """
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+    def __init__(self, *conjuncts):
+        super().__init__()
+        self.names = []
+        self.models = 1
+        for conjunct in conjuncts:
+            self.add(conjunct)
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+    def add(self, conjunct):
+        Sentence.validate(conjunct)
+        self.conjuncts.append(conjunct)
+        new = sorted(conjunct.symbols() - set(self.names))
+        self.models = extend(self.models, len(self.names), len(new))
+        self.names.extend(new)
+        instructions, (index,) = lower([conjunct], self.names)
+        self.models &= execute(instructions, len(self.names))[index]
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+    def symbols(self):
+        return set(self.names)
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        new = sorted(query.symbols() - set(self.names))
+        models = extend(self.models, len(self.names), len(new))
+        names = self.names + new
+        instructions, (index,) = lower([query], names)
+        return models & ~execute(instructions, len(names))[index] == 0
+
+    def satisfiable(self):
+        """Checks if any model satisfies the knowledge base."""
+        return self.models != 0
+
+
+def model_check_cached(knowledge, query):
+    """
+    Checks if knowledge base entails query, reusing the models cached by
+    a KnowledgeBase.
+    """
+    if not isinstance(knowledge, KnowledgeBase):
+        knowledge = KnowledgeBase(knowledge)
+    return knowledge.entails(query)
+
+
+class CNF():
+    """
+    Clauses of integer literals equisatisfiable with a set of sentences,
+    built with the Tseitin encoding so that they grow linearly with the
+    size of the sentences.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.literals = {}
+        self.clauses = []
+        self.count = 0
+        self.true = None
+
+    def variable(self, name=None):
+        """Returns the variable for a symbol name, or a new auxiliary one."""
+        if name is not None and name in self.variables:
+            return self.variables[name]
+        self.count += 1
+        if name is not None:
+            self.variables[name] = self.count
+        return self.count
+
+    def literal(self, sentence):
+        """Returns a literal that is true exactly when sentence is."""
+        if sentence in self.literals:
+            return self.literals[sentence]
+        if isinstance(sentence, Symbol):
+            literal = self.variable(sentence.name)
+        elif isinstance(sentence, Constant):
+            if self.true is None:
+                self.true = self.variable()
+                self.clauses.append([self.true])
+            literal = self.true if sentence.value else -self.true
+        elif isinstance(sentence, Not):
+            literal = -self.literal(sentence.operand)
+        elif isinstance(sentence, (And, Or)):
+            conjunction = isinstance(sentence, And)
+            operands = [self.literal(operand) for operand in (
+                sentence.conjuncts if conjunction else sentence.disjuncts
+            )]
+            if not conjunction:
+                operands = [-operand for operand in operands]
+
+            # For And, literal <=> all operands; Or is the same on negations
+            literal = self.variable()
+            for operand in operands:
+                self.clauses.append([-literal, operand])
+            self.clauses.append([literal] + [-operand for operand in operands])
+            if not conjunction:
+                literal = -literal
+        elif isinstance(sentence, Implication):
+            literal = self.literal(
+                Or(Not(sentence.antecedent), sentence.consequent)
+            )
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            literal = self.variable()
+            self.clauses.append([-literal, -left, right])
+            self.clauses.append([-literal, left, -right])
+            self.clauses.append([literal, left, right])
+            self.clauses.append([literal, -left, -right])
+        else:
+            raise Exception(f"cannot convert {sentence} to CNF")
+        self.literals[sentence] = literal
+        return literal
+
+    def add(self, sentence):
+        """Adds clauses asserting that sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        else:
+            self.clauses.append([self.literal(sentence)])
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
 
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+def to_cnf(*sentences):
+    """Returns the CNF of the conjunction of sentences."""
+    cnf = CNF()
+    for sentence in sentences:
+        cnf.add(sentence)
+    return cnf
+
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+def model_check_sat(knowledge, query):
+    """
+    Checks if knowledge base entails query, by checking with a SAT solver
+    that knowledge and not query is unsatisfiable.
+    """
+    cnf = to_cnf(knowledge, Not(query))
+    return sat.solve(cnf.clauses, cnf.count) is None
@@ -1,3 +1,5 @@
+import sys
+
 from logic import *
 
 AKnight = Symbol("A is a Knight")
@@ -29,7 +31,7 @@ KB = And(
 
 # Puzzle 0
 # A says "I am both a knight and a knave."
-knowledge0 = And(
+knowledge0 = KnowledgeBase(
     KB,
     Implication(AKnight, And(AKnight, AKnave)),
     Implication(AKnave, Not(And(AKnight, AKnave)))
@@ -38,7 +40,7 @@ knowledge0 = And(
 # Puzzle 1
 # A says "We are both knaves."
 # B says nothing.
-knowledge1 = And(
+knowledge1 = KnowledgeBase(
     KB,
     Implication(AKnight, And(AKnave, AKnight)),
     Implication(AKnave, Not(And(AKnave,BKnave)))
@@ -48,7 +50,7 @@ knowledge1 = And(
 # Puzzle 2
 # A says "We are the same kind."
 # B says "We are of different kinds."
-knowledge2 = And(
+knowledge2 = KnowledgeBase(
     KB,
     Implication(AKnight,Or(And(AKnight, BKnight),And(AKnave,BKnave))),
     Implication(AKnave,Not(Or(And(AKnight, BKnight),And(AKnave,BKnave)))),
@@ -61,7 +63,7 @@ knowledge2 = And(
 # B says "A said 'I am a knave'."
 # B says "C is a knave."
 # C says "A is a knight."
-knowledge3 = And(
+knowledge3 = KnowledgeBase(
     KB,
     Implication(AKnight,Or(AKnight,AKnave)),
     Implication(AKnave,Not(Or(AKnight,AKnave))),
@@ -76,7 +78,31 @@ knowledge3 = And(
 )
 
 
+def each(check):
+    """
+    Returns a function finding the queries a knowledge base entails by
+    calling check once per query.
+    """
+    def check_each(knowledge, queries):
+        return {query for query in queries if check(knowledge, query)}
+    return check_each
+
+
+# Ways main can find the entailed symbols, by name
+ENGINES = {
+    "many": model_check_many,
+    "enumerate": each(model_check),
+    "compiled": each(model_check_compiled),
+    "cached": each(model_check_cached),
+    "sat": each(model_check_sat)
+}
+
+
 def main():
+    if len(sys.argv) > 2 or (len(sys.argv) == 2
+                             and sys.argv[1] not in ENGINES):
+        sys.exit(f"Usage: python puzzle.py [{'|'.join(ENGINES)}]")
+    entailed_by = ENGINES[sys.argv[1] if len(sys.argv) == 2 else "many"]
     symbols = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
     puzzles = [
         ("Puzzle 0", knowledge0),
@@ -89,8 +115,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
+            entailed = entailed_by(knowledge, symbols)
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if symbol in entailed:
                     print(f"    {symbol}")
 
 
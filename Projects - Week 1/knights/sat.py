@@ -0,0 +1,288 @@
+"""
+Conflict-driven clause learning SAT solver.
+
+Variables are numbered from 1 and a literal is a variable (true) or its
+negation (false), as in the DIMACS format. Clauses are lists of literals.
+"""
+import heapq
+
+# Conflicts before the first restart; later restarts follow the Luby
+# sequence in multiples of this
+RESTART_BASE = 100
+
+# Factor by which variable activity increments grow after each conflict
+DECAY = 0.95
+
+# Rescale activities once any exceeds this
+MAX_ACTIVITY = 1e100
+
+
+def luby(i):
+    """Returns term i (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    if (1 << k) - 1 == i:
+        return 1 << (k - 1)
+    return luby(i - (1 << (k - 1)) + 1)
+
+
+class Solver():
+    """
+    Incremental CDCL solver with two watched literals per clause,
+    first-UIP clause learning, activity-based branching, phase saving and
+    restarts. Clauses may be added between calls to solve.
+    """
+
+    def __init__(self, count=0):
+        self.count = 0
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+        self.watches = {}
+        self.clauses = []
+        self.learned = []
+        self.trail = []
+        self.limits = []
+        self.head = 0
+        self.heap = []
+        self.increment = 1.0
+        self.unsat = False
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        self.reserve(count)
+
+    def reserve(self, count):
+        """Makes variables 1 to count available."""
+        while self.count < count:
+            self.count += 1
+            self.values.append(None)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.activity.append(0.0)
+            self.phases.append(False)
+            heapq.heappush(self.heap, (0.0, self.count))
+
+    def value(self, literal):
+        value = self.values[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def watch(self, clause):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def add_clause(self, literals):
+        """
+        Adds a clause. Returns False if the clauses are now known to be
+        unsatisfiable.
+        """
+        self.backtrack(0)
+        clause = []
+        for literal in literals:
+            self.reserve(abs(literal))
+            if -literal in clause:
+                return not self.unsat
+            if literal not in clause:
+                clause.append(literal)
+        if self.unsat:
+            return False
+
+        # Drop literals already false at the top level
+        clause = [literal for literal in clause
+                  if self.value(literal) is not False]
+        if any(self.value(literal) for literal in clause):
+            return True
+        if not clause:
+            self.unsat = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.unsat = True
+        else:
+            self.clauses.append(clause)
+            self.watch(clause)
+        return not self.unsat
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses. Returns a clause
+        with every literal false if there is a conflict, otherwise None.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            self.propagations += 1
+            watchers = self.watches.get(false, [])
+            kept = []
+            self.watches[false] = kept
+            for index, clause in enumerate(watchers):
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) is True:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal to watch instead
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(clause[0]) is False:
+                        kept.extend(watchers[index + 1:])
+                        return clause
+                    self.assign(clause[0], clause)
+        return None
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > MAX_ACTIVITY:
+            self.activity = [activity / MAX_ACTIVITY
+                             for activity in self.activity]
+            self.increment /= MAX_ACTIVITY
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, self.count + 1)
+                         if self.values[v] is None]
+            heapq.heapify(self.heap)
+        elif self.values[variable] is None:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+    def analyze(self, conflict):
+        """
+        Derives a first-UIP clause from a conflict. Returns the clause,
+        asserting literal first, and the level to backjump to.
+        """
+        level = len(self.limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for literal in clause:
+                variable = abs(literal)
+                if variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(literal)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+        learned[0] = -literal
+
+        backjump = 0
+        if len(learned) > 1:
+            deepest = max(range(1, len(learned)),
+                          key=lambda i: self.levels[abs(learned[i])])
+            learned[1], learned[deepest] = learned[deepest], learned[1]
+            backjump = self.levels[abs(learned[1])]
+        return learned, backjump
+
+    def backtrack(self, level):
+        """Undoes every assignment made above decision level `level`."""
+        if len(self.limits) <= level:
+            return
+        limit = self.limits[level]
+        for literal in self.trail[limit:]:
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            self.values[variable] = None
+            self.reasons[variable] = None
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[limit:]
+        del self.limits[level:]
+        self.head = limit
+
+    def pick(self):
+        """Returns the unassigned variable of highest activity, if any."""
+        while self.heap:
+            activity, variable = heapq.heappop(self.heap)
+            if (self.values[variable] is None
+                    and -activity == self.activity[variable]):
+                return variable
+        for variable in range(1, self.count + 1):
+            if self.values[variable] is None:
+                return variable
+        return None
+
+    def solve(self):
+        """
+        Returns a satisfying assignment as a dictionary mapping each
+        variable to True or False, or None if there is none.
+        """
+        if self.unsat:
+            return None
+        self.backtrack(0)
+        if self.propagate() is not None:
+            self.unsat = True
+            return None
+
+        restarts = 1
+        budget = RESTART_BASE * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.limits:
+                    self.unsat = True
+                    return None
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.learned.append(learned)
+                    self.watch(learned)
+                    self.assign(learned[0], learned)
+                self.increment /= DECAY
+
+                budget -= 1
+                if budget == 0:
+                    restarts += 1
+                    budget = RESTART_BASE * luby(restarts)
+                    self.backtrack(0)
+                continue
+
+            variable = self.pick()
+            if variable is None:
+                model = {v: self.values[v] for v in range(1, self.count + 1)}
+                self.backtrack(0)
+                return model
+            self.decisions += 1
+            self.limits.append(len(self.trail))
+            self.assign(variable if self.phases[variable] else -variable, None)
+
+
+def solve(clauses, count=0):
+    """
+    Returns a satisfying assignment for a list of clauses as a dictionary
+    mapping each variable to True or False, or None if there is none.
+    """
+    solver = Solver(count)
+    for clause in clauses:
+        if not solver.add_clause(clause):
+            return None
+    return solver.solve()
@@ -84,6 +84,39 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+def cells_to_mask(cells, width):
+    """
+    Returns the bitmask of a set of cells on a board `width` cells wide,
+    where cell (i, j) is bit i * width + j.
+    """
+    mask = 0
+    for i, j in cells:
+        if i < 0 or not 0 <= j < width:
+            raise ValueError(f"cell {(i, j)} is not on the board")
+        mask |= 1 << (i * width + j)
+    return mask
+
+
+def mask_to_cells(mask, width):
+    """
+    Returns the set of cells in a bitmask on a board `width` cells wide.
+    """
+    cells = set()
+    while mask:
+        bit = mask & -mask
+        cells.add(divmod(bit.bit_length() - 1, width))
+        mask ^= bit
+    return cells
+
+
+# Number of cells in a bitmask; int.bit_count needs Python 3.10
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:
+    def popcount(mask):
+        return bin(mask).count("1")
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
@@ -105,7 +138,6 @@ class Sentence():
         """
         Returns the set of all cells in self.cells known to be mines.
         """
-        
         if len(self.cells) == self.count and self.count != 0:
             return self.cells
         return set()
@@ -114,7 +146,6 @@ class Sentence():
         """
         Returns the set of all cells in self.cells known to be safe.
         """
-        
         if self.count == 0:
             return self.cells
         return set()
@@ -151,30 +182,68 @@ class MinesweeperAI():
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
-        # Keep track of cells known to be safe or mines
+        # Keep track of cells known to be safe or mines, as sets and masks
         self.mines = set()
         self.safes = set()
+        self.mine_mask = 0
+        self.safe_mask = 0
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true, as a set of
+        # (mask, count) pairs with the cells kept as a bitmask
+        # (see cells_to_mask), so subset tests and differences are
+        # single integer operations
+        self.knowledge = set()
+
+    def sentences(self):
+        """
+        Returns the knowledge base as a list of Sentence objects.
+        """
+        return [Sentence(mask_to_cells(mask, self.width), count)
+                for mask, count in self.knowledge]
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
-        self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.mark(cells_to_mask([cell], self.width), 0)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
-        self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self.mark(0, cells_to_mask([cell], self.width))
+
+    def mark(self, mines, safes):
+        """
+        Marks bitmasks of cells as mines and as safe, and updates all
+        knowledge, dropping sentences left without cells.
+        """
+        self.mines |= mask_to_cells(mines & ~self.mine_mask, self.width)
+        self.safes |= mask_to_cells(safes & ~self.safe_mask, self.width)
+        self.mine_mask |= mines
+        self.safe_mask |= safes
+
+        known = mines | safes
+        knowledge = set()
+        for mask, count in self.knowledge:
+            if mask & known:
+                count -= popcount(mask & mines)
+                mask &= ~known
+            if mask:
+                knowledge.add((mask, count))
+        self.knowledge = knowledge
+
+    def add_sentence(self, mask, count):
+        """
+        Adds a sentence to the knowledge base unless it is empty or
+        already known. Returns True if it was added.
+        """
+        if not mask or (mask, count) in self.knowledge:
+            return False
+        self.knowledge.add((mask, count))
+        return True
 
     def add_knowledge(self, cell, count):
         """
@@ -191,73 +260,57 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
-        
         self.moves_made.add(cell)
-        
-        self.safes.add(cell)
-        
-        surroundings = set()
-        
-        #Loops over the surrounding cells and appends them to the new sentence if they are within the range of the board
+        self.mark_safe(cell)
+
+        # Neighbouring cells on the board, leaving out those already known
+        mask = 0
         for i in range(cell[0] - 1, cell[0] + 2):
             for j in range(cell[1] - 1, cell[1] + 2):
-                newCell = (i,j)
-                if i in range(self.height) and j in range(self.width):
-                    surroundings.add(newCell)
-                    
-        newSentence = Sentence(surroundings, count)
-        safes = newSentence.known_safes()
-        
-        self.knowledge.append(newSentence)
-
-        for sentence in self.knowledge:
-            if sentence.count == 0:
-                for ground in sentence.known_safes():
-                    self.safes.add(ground)
-            
-        for safe in self.safes:
-            self.mark_safe(safe)
-        
+                if ((i, j) != cell
+                        and 0 <= i < self.height and 0 <= j < self.width):
+                    mask |= 1 << (i * self.width + j)
+        count -= popcount(mask & self.mine_mask)
+        mask &= ~(self.mine_mask | self.safe_mask)
+        self.add_sentence(mask, count)
+
+        # Draw conclusions until nothing new follows
+        while True:
+            mines = safes = 0
+            for mask, count in self.knowledge:
+                if count == 0:
+                    safes |= mask
+                elif popcount(mask) == count:
+                    mines |= mask
+            if mines or safes:
+                self.mark(mines, safes)
+            elif not self.infer_subsets():
+                break
+
+    def infer_subsets(self):
+        """
+        Adds the sentence (set2 - set1) = count2 - count1 for every pair
+        of known sentences where set1 is a subset of set2. Returns True
+        if any sentence was added.
+        """
+        # Sentences containing each cell, so that only overlapping
+        # sentences are compared
+        containing = {}
         for sentence in self.knowledge:
-            if 1 <= len(sentence.cells):
-                for explosive in sentence.known_mines():
-                    self.mines.add(explosive)
-        
-        for mine in self.mines:
-            self.mark_mine(mine)
-        
-        #GPT :C
-        self.knowledge = [sentence for sentence in self.knowledge if sentence.cells]
-        
-        new_knowledge = []
-        
-        for sentence1 in self.knowledge:
-            for sentence2 in self.knowledge:
-                if sentence1 != sentence2 and sentence1.cells.issubset(sentence2.cells):
-                    new_cells = sentence2.cells - sentence1.cells
-                    new_count = sentence2.count - sentence1.count
-                    new_sentence = Sentence(new_cells, new_count)
-                    if new_sentence not in self.knowledge:
-                        print(f"The new generated sentence is {new_sentence}")
-                        new_knowledge.append(new_sentence)
-        
-        self.knowledge.extend(new_knowledge)
-                    
-        
-        print("New Move")
-        print(f"Safes: {self.safes}")
-        print(f"Mines: {self.mines}")
-        
-        '''
-        
-        comparar sentences con cada una 
-        sacar los safes de cada una 
-        
-        sentences = getSafes, getKnown, markSafe, markMine
-        AI = markMineALL, markSafeALL, addKnowledge
-        
-        '''
-        
+            mask = sentence[0]
+            while mask:
+                bit = mask & -mask
+                containing.setdefault(bit, []).append(sentence)
+                mask ^= bit
+
+        added = False
+        for subset, subset_count in list(self.knowledge):
+            lowest = subset & -subset
+            for superset, superset_count in containing[lowest]:
+                if superset != subset and not subset & ~superset:
+                    added |= self.add_sentence(superset ^ subset,
+                                               superset_count - subset_count)
+        return added
 
     def make_safe_move(self):
         """
@@ -268,10 +321,9 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        
-        for i in self.safes.copy():
-            if i not in self.moves_made.copy():
-                return i
+        for cell in self.safes:
+            if cell not in self.moves_made:
+                return cell
         return None
 
     def make_random_move(self):
@@ -282,15 +334,11 @@ class MinesweeperAI():
             2) are not known to be mines
         """
         choices = []
-        
         for i in range(self.height):
             for j in range(self.width):
                 if (i, j) not in self.moves_made and (i, j) not in self.mines:
-                    
-                    choices.append((i,j))
-                
+                    choices.append((i, j))
+
         if choices:
             return random.choice(choices)
         return None
-                
-        